@@ -1,169 +1,202 @@
+import fcntl
 import os
 import datetime
-import json
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import lru_cache
-from bisect import bisect_right
-from collections import UserList
+from collections import namedtuple
 import time
+import threading
+from concurrent.futures import Future
 
 from skyfield.api import Loader, Topos
 import pytz
-from scioto import pairwise
+import numpy as np
+import sky.table
+from sky.table import (
+    Column, MinuteTable, EventTable, Event, ChebyshevTable, TableWriter, Threshold, MINUTES_PER_DAY,
+    read_table, write_events, crossing_events, crossing_arrays, refine_crossings, compute_table_in_parallel,
+    fit_chebyshev, write_chebyshev,
+)
 
 
 BASE_FOLDER = Path('~/.scioto').expanduser()  # TODO Need a better choice
-MOON_POSITION = BASE_FOLDER / "Moon-Minute-by-Minute.json"
-HORIZON_EVENTS = BASE_FOLDER / 'Moon-Horizon-Events.json'
-
-
-__all__ = ['load_moon', 'load_moon_events']
+MOON_POSITION = BASE_FOLDER / "Moon-Minute-by-Minute.bin"
+POSITION_COLUMNS = (Column('alt'), Column('az'))
+SUMMARY_COLUMNS = (
+    Column('illumination', '<i2', 10000),  # fraction of the disc that's lit
+    Column('phase', '<u2', 100),  # the Moon's ecliptic longitude less the Sun's
+    Column('distance', '<i4', 1),  # geocentric, miles
+    Column('speed', '<i2', 1),  # geocentric, miles per hour
+)
+MOON_COLUMNS = POSITION_COLUMNS + SUMMARY_COLUMNS
+KM_PER_MILE = 1.609344
+QUARTER_MINUTES = 9 * MINUTES_PER_DAY  # More than any quarter of a lunation
+HORIZON_EVENTS = BASE_FOLDER / 'Moon-Horizon-Events.bin'
+MOON_FIT = BASE_FOLDER / 'Moon-Chebyshev.bin'
+MOON_ADDITION = BASE_FOLDER / 'Moon-Addition.bin'
+MOON_LOCK = BASE_FOLDER / 'Moon.lock'  # Held while the table is extended
+YEARS = 1  # The default number of years covered by the Moon table
+FIT_BLOCK_DAYS = 31  # Days calculated at a time for the fit
+MOON_RADIUS_KM = 1737.4
+HORIZON_REFRACTION = 34 / 60  # The standard refraction at the horizon, degrees
+# The altitude of the Moon's centre at moonrise and moonset, near enough
+# to find them in the table; each is then solved for exactly.
+THRESHOLDS = (Threshold(-HORIZON_REFRACTION - 0.26, 'Rise', 'Set'),)
+SEARCH_SECONDS = 600  # On either side of a rise or set found in the table
+
+MoonSummary = namedtuple('MoonSummary', 'illumination phase distance speed')
+
+
+__all__ = ['load_moon', 'load_moon_events', 'load_moon_fit']
+
+
+def load_moon(lazy=False, extend=None):
+    """
+    The Moon table. Once a new month has begun, the table is brought
+    up to date in the background (see `extend_moon_table`) if `extend`,
+    which by default it is unless the table is loaded `lazy`, as by a
+    short-lived script; meanwhile the table as it is serves. The table
+    looks again each time the month changes, so a long-running program
+    keeps it up to date by calling `load_moon()` for the new table.
+    """
+    moon = _open_moon(lazy)
+    if extend is None:
+        extend = not lazy
+    if extend:
+        moon.extend = True
+        moon.check_window()
+    return moon
 
 
-@lru_cache(maxsize=1)
-def load_moon():
+@lru_cache(maxsize=2)
+def _open_moon(lazy):
     assert MOON_POSITION.exists(), f"You must create {MOON_POSITION.name} first!"
-    data = json.loads(MOON_POSITION.read_text())
-    return Moon(**data)
+    return Moon(*read_table(MOON_POSITION, lazy))
 
 
 @lru_cache(maxsize=1)
 def load_moon_events():
     assert HORIZON_EVENTS.exists(), f"You must create {HORIZON_EVENTS.name} first!"
-    return MoonEvents(json.loads(HORIZON_EVENTS.read_text()))
+    return MoonEvents(*read_table(HORIZON_EVENTS))
 
 
-class Position:
-    """
-    Wraps the Moon position info into a friendlier format
-    that looks better both on the command line and in the Notebook.
-    """
-    def __init__(self, value, index, year=None):
-        if year is None:
-            year = datetime.date.today().year
-        self.date = datetime.datetime(year, *value[:4])
-        self.alt = value[4]
-        self.az = value[5]
-        self.index = index
+@lru_cache(maxsize=1)
+def load_moon_fit():
+    assert MOON_FIT.exists(), f"You must create {MOON_FIT.name} first!"
+    return ChebyshevTable(*read_table(MOON_FIT))
 
-    def __repr__(self):
-        return "{0.date:%A %-d %b %-H:%M} Alt={0.alt:.0f}° Az={0.az:.0f}°".format(self)
 
-    def _repr_html_(self):
-        """Having fun with display in the Jupyter Notebook"""
-        # Yellow Sun = 0x1f31e, Black Sun = 0x2600
-        if self.alt > 0:
-            tag, front, behind = 'b', '&#x1f31e;', ''  # yellow sun, bold text
-        else:
-            tag, front, behind = 'em', '', '&#x2600;'  # black sun, italic text
-        return f"{front}<{tag}>{self!r}</{tag}>{behind}"
+class Position(sky.table.Position):
+    """A minute's position of the Moon"""
+    __slots__ = ()
+    glyphs = ('&#x1f315;', '&#x1f311;')  # Full Moon, New Moon
 
 
-class Moon(UserList):
+class Moon(MinuteTable):
     """
-    Minute-by-minute positions of the Moon for an entire year.
+    Minute-by-minute positions of the Moon, from the start of a month for
+    one or more years. The Moon's positions don't repeat from year to year,
+    so each row is for a particular date.
 
     The position for each minute is stored as a tuple:
         (month, day, hour, minute, altitude, azimuth)
 
     now() return the tuple associated with the current time.
 
-    at(*args) searches for the specified info.
+    at(*args) looks up the specified info.
     """
-    def __init__(self, **kwargs):
-        super().__init__(kwargs.pop('positions'))
-        self.latitude = kwargs.pop('latitude')
-        self.longitude = kwargs.pop('longitude')
-        self.elevation = kwargs.pop('elevation')
-        self.tz = pytz.timezone(kwargs.pop('tz'))
+    position_class = Position
+    extend = False  # Set by `load_moon` when the table should be kept up to date
+
+    def __init__(self, header, columns, tz=None):
+        super().__init__(header, columns, tz)
+        self.latitude = header['latitude']
+        self.longitude = header['longitude']
+        self.elevation = header['elevation']
+        self._window_month = None
+
+    def check_window(self):
+        """
+        Once a month, if the table is to be kept up to date, start
+        bringing it up to date when it no longer starts this month.
+        """
+        month = datetime.date.today().replace(day=1)
+        if not self.extend or month == self._window_month:
+            return
+        self._window_month = month
+        if moon_window(self.header.get('years', YEARS))[0] > self.start:
+            extend_in_background()
+
+    def at_time(self, when):
+        self.check_window()
+        return super().at_time(when)
 
     def __repr__(self):
         return "<Moon positions for Lat {0.latitude:.2f}°, Lon {0.longitude:.2f}°>".format(self)
 
-    def __getitem__(self, index):
-        """Returns the Position at the specified index"""
-        return Position(self.data[index], index)
+    def _minute(self, when):
+        """The row of a datetime (naive ones are local times), or now"""
+        if 'phase' not in self.columns:
+            raise ValueError(f"The Moon table has no phases; create {MOON_POSITION.name} again")
+        self.check_window()
+        if when is None:
+            when = datetime.datetime.now(pytz.utc)
+        return self._checked(self.utc_minute(self._aware(when)), when)
+
+    def summary(self, when=None):
+        """
+        The `MoonSummary` at a time, by default now: the illuminated
+        fraction, the phase in degrees (0 new, 90 first quarter, 180 full,
+        270 last quarter), and the geocentric distance and speed in miles
+        and miles per hour.
+        """
+        index = self._minute(when)
+        return MoonSummary(*(float(column.decode(raw[index]))
+                             for column, raw in (self.columns[c.name] for c in SUMMARY_COLUMNS)))
 
-    def at(self, *args):
+    def quarters(self, when=None):
         """
-        Returns the `Position` of the Moon at a specified
-        (month, day, hour, minute). You can
-        use up to 4 arguments, depending on how close you want to specify.
+        The Moon's quarters before and after a time, by default now, as
+        (quarter, UTC datetime) pairs: quarter 0 is the new moon, 1 first
+        quarter, 2 full moon and 3 last quarter. Either is None if it is
+        beyond the ends of the table.
         """
-        index = bisect_right(self.data, list(args))
-        if index:
-            return self[index]
-        raise ValueError
+        index = self._minute(when)
+        first = max(index - QUARTER_MINUTES, 0)
+        column, raw = self.columns['phase']
+        quarter = (column.decode(raw[first:index + QUARTER_MINUTES]) // 90).astype(int) % 4
+        changes = np.flatnonzero(quarter[1:] != quarter[:-1]) + 1
+
+        def found(offsets):
+            if len(offsets) == 0:
+                return None
+            offset = int(offsets[0])
+            date = self.start + datetime.timedelta(minutes=first + offset)
+            return int(quarter[offset]), pytz.utc.localize(date)
 
-    def now(self):
-        """Return the `Position` of the Moon at the current time"""
-        date = datetime.datetime.now()
-        return self.at(date.month, date.day, date.hour, date.minute)
+        return found(changes[first + changes <= index][::-1]), found(changes[first + changes > index])
 
 
-class MoonEvents(UserList):
+class DayEvents(sky.table.DayEvents):
+    title = 'Moon Events'
+
+
+class MoonEvents(EventTable):
     """
     A list of moonrise and moonset events for the entire year.
     """
+    event_class = Event
+
     def __repr__(self):
         return f"<Moon: {len(self):,} Events>"
 
-    def at(self, *args):
-        index = bisect_right(self.data, tuple(args))
-        return Event(self[index])
-
-    def on_date(self, month, day):
-        key = [month, day]
-        index = bisect_right(self.data, key)
-        return [
-            Event(value, datetime.date.today().year)
-            for value in self[index:]
-            if value[:2] == key
-        ]
+    def on_date(self, date):
+        return self.on(date)
 
     def today(self):
         """Returns a list of the events for the current date"""
-        date = datetime.date.today()
-        key = [date.month, date.day]
-        index = bisect_right(self.data, key)
-        return DayEvents([
-            Event(value, date.year)
-            for value in self[index:]
-            if value[:2] == key
-        ])
-
-
-class DayEvents(UserList):
-    """Wraps all events for a given day."""
-    def _repr_html_(self):
-        s = []
-        a = s.append
-        a(f"<h2>Moon Events on {self[0].date:%A, %-d %B %Y}</h2>")
-        a(f"<ul>")
-        for ev in self:
-            a(f"<li>{ev!s}</li>")
-        a("</ul>")
-        return ''.join(s)
-
-
-class Event:
-    def __init__(self, value, year=None):
-        if year is None:
-            year = datetime.date.today().year
-        self.date = datetime.datetime(year, *value[:4])
-        self.name = value[4]
-        self.az = value[5]
-
-    def __repr__(self):
-        return f"{self.date:%a %d %b %H:%M} {self.name} {self.az}°"
-
-    def __str__(self):
-        if self.name in ('Rise', 'Set'):  # suppress azimuth for twilight events
-            az = f"@{self.az}°"
-        else:
-            az = ''
-        return f"{self.date:%-H:%M} {self.name} {az}"
+        date = datetime.datetime.now(self.tz)
+        return DayEvents(self.on(date.date()))
 
 
 """
@@ -173,92 +206,251 @@ for a new geographic location.
 """
 
 
-def position(jd, alt, az, tz):
-    """Returns a convenient tuple for the calculated Moon position."""
-    date = jd.astimezone(tz=tz)
-    return date.month, date.day, date.hour, date.minute, round(alt, 1), round(az, 1)
-
-
-def compute_positions_for_date(date, *, latitude, longitude, elevation=0, tz):
-    """Calculate the position of the Sun for every minute of the specified date."""
-    # Set up Skyfield.
+def start_worker(latitude, longitude, elevation, start):
+    """Set up Skyfield once in each worker process."""
     loader = Loader(os.environ['SKYFIELD_LOADER_DIRECTORY'])
     planets = loader(os.getenv('SKYFIELD_SPICE_KERNEL', 'de421.bsp'))
     ts = loader.timescale()
-    where = planets['earth'] + Topos(latitude_degrees=latitude,
-                                     longitude_degrees=longitude,
-                                     elevation_m=elevation)
-
-    every_minute = ts.utc(date.year, date.month, date.day, 0, range(1440))
-    alt, az, _ = where.at(every_minute).observe(planets['moon']).apparent().altaz()
-    return [
-        position(jd, alt, az, tz)
-        for jd, alt, az in zip(every_minute, alt.degrees, az.degrees)
-    ]
+    topos = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+    return ts, planets, topos, start
 
 
-def create_moon_minute_by_minute(*, latitude, longitude, elevation, tz):
+def compute_positions_for_days(worker, first_day, days):
     """
-    Compute Moon locations for every minute over an entire year.
-    Use `concurrent.futures` to calculate these days in parallel;
-    it speeds up the process a fair amount.
-
-    We calculate for a leap year so that the resulting table is
-    useful for any year.
+    Calculate the position of the Moon, without refraction, for every
+    minute of a block of days (see `sky.bodies.compute_altaz`).
+    """
+    from sky.bodies import compute_altaz  # scipy is only needed for the tables
+    ts, planets, topos, start = worker
+    first = start + datetime.timedelta(days=first_day)
+    minutes = np.arange(days * MINUTES_PER_DAY)
+    (alt, az), = compute_altaz(ts, planets['earth'] + topos, topos, [planets['moon']],
+                               first, minutes, refraction=False)
+    return alt, az
 
-    Most recently it took 54.5 seconds to calculate the minute-by-minute data.
 
-    My testing shows the the difference between doing this for a leap year
-    and a non-leap year is minimal.
+def compute_moon_for_days(worker, first_day, days):
     """
-    date = datetime.date.today().replace(day=1)
-    one_year_later = date.replace(month=date.month + 1)
-    fs = []
-    results = []
-    beginning = time.perf_counter()
-    with ProcessPoolExecutor() as ex:
-        while date < one_year_later:
-            fs.append(
-                ex.submit(
-                    compute_positions_for_date, date,
-                    latitude=latitude, longitude=longitude, elevation=elevation, tz=tz))
-            date += datetime.timedelta(days=1)
-        print(len(fs), "futures submitted.")
-        for counter, future in enumerate(as_completed(fs), start=1):
-            results.extend(future.result())
-            print(f"{counter:3}. {len(results):,}")
-    results.sort()
-    data = {
+    Calculate every column of the Moon table for every minute of a block
+    of days. Like the position, the illumination, phase, distance and
+    speed are calculated every `sky.bodies.SAMPLE_MINUTES` and interpolated.
+    """
+    from scipy.interpolate import CubicSpline
+    from sky.bodies import SAMPLE_MINUTES
+    alt, az = compute_positions_for_days(worker, first_day, days)
+    ts, planets, topos, start = worker
+    first = start + datetime.timedelta(days=first_day)
+    minutes = np.arange(days * MINUTES_PER_DAY)
+    samples = np.arange(0, len(minutes) + 2 * SAMPLE_MINUTES, SAMPLE_MINUTES)
+    earth = planets['earth'].at(ts.utc(first.year, first.month, first.day, 0, samples))
+    moon = earth.observe(planets['moon'])
+    sun = earth.observe(planets['sun'])
+
+    # The phase angle is at the Moon, between the Sun and the Earth.
+    to_sun = sun.position.au - moon.position.au
+    to_earth = -moon.position.au
+    cos_phase_angle = (np.sum(to_sun * to_earth, axis=0)
+                       / np.linalg.norm(to_sun, axis=0) / np.linalg.norm(to_earth, axis=0))
+    phase = (moon.ecliptic_latlon(epoch='date')[1].degrees
+             - sun.ecliptic_latlon(epoch='date')[1].degrees)
+    illumination = (1 + cos_phase_angle) / 2
+    distance = moon.distance().km / KM_PER_MILE
+    speed = np.linalg.norm(moon.velocity.km_per_s, axis=0) * 3600 / KM_PER_MILE
+
+    def every_minute(values):
+        return CubicSpline(samples, values)(minutes)
+
+    return (alt, az, every_minute(illumination), every_minute(np.unwrap(phase, period=360)) % 360,
+            every_minute(distance), every_minute(speed))
+
+
+def moon_window(years, today=None):
+    """The (start, end) of a table covering `years` years from the start of this month"""
+    date = (today or datetime.date.today()).replace(day=1)
+    start = datetime.datetime(date.year, date.month, date.day)
+    return start, start.replace(year=start.year + years)
+
+
+def moon_header(*, latitude, longitude, elevation, tz, start, years=YEARS):
+    return {
+        'body': 'moon',
         'latitude': latitude,
         'longitude': longitude,
         'elevation': elevation,
-        'tz': tz.zone,
-        'positions': results,
+        'tz': str(tz),
+        'year': start.year,
+        'years': years,
+        'start': f"{start:%Y-%m-%dT%H:%M}",
     }
-    MOON_POSITION.write_text(json.dumps(data))
-    print(f"{MOON_POSITION!s}: {MOON_POSITION.stat().st_size:,} bytes.")
-    print(f"Elapsed time {time.perf_counter() - beginning:.1f} seconds")
-
-
-def create_horizon_event_data():
-    """Moonrise and moonset"""
-    data = load_moon().data
-    events = []
-    for a, b in pairwise(data):
-        # Check for rise and set
-        if a[4] <= 0 < b[4]:
-            name = 'Rise'
-        elif a[4] > 0 >= b[4]:
-            name = 'Set'
-        else:
-            name = None
-        if name is not None:
-            rec = b[:4] + [name, int(b[-1])]
-            events.append(rec)
-
-    events.sort()
-    HORIZON_EVENTS.write_text(json.dumps(events))
-    print(len(events), "horizon events")
+
+
+def create_moon_minute_by_minute(*, latitude, longitude, elevation, tz, years=YEARS, verbose=True, today=None):
+    """
+    Compute Moon positions, with the illumination, phase, distance and
+    speed (see `SUMMARY_COLUMNS`), for every minute of `years` years,
+    from the start of the current month. Use `concurrent.futures` to
+    calculate blocks of days in parallel; it speeds up the process a
+    fair amount.
+
+    With `sky.bodies.compute_altaz` a year takes a few seconds;
+    a full Skyfield calculation for every minute took 54.5 seconds.
+    After that, `extend_moon_table` keeps the table up to date.
+    """
+    start, end = moon_window(years, today)
+    beginning = time.perf_counter()
+    header = moon_header(latitude=latitude, longitude=longitude, elevation=elevation,
+                         tz=tz, start=start, years=years)
+    compute_table_in_parallel(
+        MOON_POSITION, header, MOON_COLUMNS,
+        setup=start_worker, setup_args=(latitude, longitude, elevation, start),
+        compute=compute_moon_for_days, days=(end - start).days, verbose=verbose)
+    if verbose:
+        print(f"{MOON_POSITION!s}: {MOON_POSITION.stat().st_size:,} bytes.")
+        print(f"Elapsed time {time.perf_counter() - beginning:.1f} seconds")
+
+
+def extend_moon_table(today=None, verbose=True):
+    """
+    Move the Moon table's window of years on to the start of the current
+    month: only the days missing at the end are calculated, and the days
+    now in the past are dropped. The horizon events are then made again.
+    Returns False if the table was already up to date.
+
+    The new table replaces the file; tables already open keep reading
+    the old one. Only one process at a time extends the table (see
+    `MOON_LOCK`); any other waits for it, then finds the table up to date.
+    """
+    with MOON_LOCK.open('a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return _extend_moon_table(today, verbose)
+
+
+def _extend_moon_table(today, verbose):
+    header, columns = read_table(MOON_POSITION)
+    location = {key: header[key] for key in ('latitude', 'longitude', 'elevation', 'tz')}
+    years = header.get('years', YEARS)
+    old_start = datetime.datetime.strptime(header['start'], '%Y-%m-%dT%H:%M')
+    old_end = old_start + datetime.timedelta(minutes=header['rows'])
+    start, end = moon_window(years, today)
+    if start <= old_start and end <= old_end:
+        return False
+    if start >= old_end or any(column.name not in columns for column in MOON_COLUMNS):
+        create_moon_minute_by_minute(years=years, verbose=verbose, today=today, **location)
+    else:
+        new_days = (end - old_end).days
+        compute_table_in_parallel(
+            MOON_ADDITION, moon_header(start=old_end, years=years, **location), MOON_COLUMNS,
+            setup=start_worker,
+            setup_args=(header['latitude'], header['longitude'], header['elevation'], old_end),
+            compute=compute_moon_for_days, days=new_days, verbose=verbose)
+        _, added = read_table(MOON_ADDITION)
+        kept = (start - old_start) // datetime.timedelta(minutes=1)
+        header = moon_header(start=start, years=years, **location)
+        block = 31 * MINUTES_PER_DAY
+        rows = (end - start).days * MINUTES_PER_DAY
+        with TableWriter(MOON_POSITION, header, MOON_COLUMNS, rows) as writer:
+            for table, first in ((columns, kept), (added, 0)):
+                for row in range(first, len(table['alt'][1]), block):
+                    writer.append([column.decode(table[column.name][1][row:row + block])
+                                   for column in MOON_COLUMNS])
+        MOON_ADDITION.unlink()
+    create_horizon_event_data(Moon(*read_table(MOON_POSITION)), verbose=verbose)
+    return True
+
+
+_extending = None
+_extending_lock = threading.Lock()
+
+
+def extend_in_background():
+    """
+    Start `extend_moon_table` in a background thread, unless it's already
+    running. Returns its Future; when it's done, `load_moon()` and
+    `load_moon_events()` load the new tables. The thread is a daemon, so
+    it never keeps a script from exiting; an extension cut short is just
+    started again next time.
+    """
+    global _extending
+    with _extending_lock:
+        if _extending is None or _extending.done():
+            future = _extending = Future()
+
+            def extend():
+                try:
+                    result = extend_moon_table(verbose=False)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    _open_moon.cache_clear()
+                    load_moon_events.cache_clear()
+                    future.set_result(result)
+
+            threading.Thread(target=extend, name='moon-extend', daemon=True).start()
+        return _extending
+
+
+def create_moon_fit(*, latitude, longitude, elevation, tz):
+    """
+    Fit Chebyshev series to the Moon's positions for a year, one set for
+    each day (see `sky.table.ChebyshevTable`): about 75 KB in all, and
+    accurate to about 0.00001°. The positions are calculated a block of
+    days at a time, so only one block is ever in memory.
+    """
+    start, end = moon_window(YEARS)
+    days = (end - start).days
+    worker = start_worker(latitude, longitude, elevation, start)
+    fits, errors = [], []
+    for first_day in range(0, days, FIT_BLOCK_DAYS):
+        alt, az = compute_positions_for_days(worker, first_day, min(FIT_BLOCK_DAYS, days - first_day))
+        coefficients, error = fit_chebyshev(alt, az)
+        fits.append(coefficients)
+        errors.append(error)
+    header = moon_header(latitude=latitude, longitude=longitude, elevation=elevation, tz=tz, start=start)
+    write_chebyshev(MOON_FIT, header, np.concatenate(fits),
+                    segment_minutes=MINUTES_PER_DAY, max_error=max(errors))
+    print(f"{MOON_FIT!s}: {MOON_FIT.stat().st_size:,} bytes, within {max(errors):.1e}°")
+
+
+def create_horizon_event_data(moon=None, verbose=True):
+    """
+    Moonrise and moonset: when the upper limb of the Moon is on the
+    horizon, with the standard refraction there. The Moon's positions
+    in the table are topocentric, so the parallax is already allowed for.
+    The transits and culminations are added too (see
+    `sky.bodies.transit_events`).
+
+    Each rise and set is found near the table's altitudes crossing
+    `THRESHOLDS`, then solved for to a tenth of a second with the
+    Moon's semi-diameter at that moment. The whole year's events are
+    solved together (see `sky.table.refine_crossings`), with one
+    Skyfield calculation for all of them per iteration.
+    """
+    from sky.bodies import transit_events
+    if moon is None:
+        moon = load_moon(extend=False)
+    ts, planets, topos, start = start_worker(moon.latitude, moon.longitude, moon.elevation, moon.start)
+    observer = planets['earth'] + topos
+
+    def observe(seconds):
+        t = ts.utc(start.year, start.month, start.day, 0, 0, seconds)
+        return observer.at(t).observe(planets['moon']).apparent()
+
+    def upper_limb(seconds):
+        alt, _, distance = observe(seconds).altaz()
+        return alt.degrees + np.degrees(np.arcsin(MOON_RADIUS_KM / distance.km)) + HORIZON_REFRACTION
+
+    which, seconds, rising, _ = crossing_arrays(
+        moon.column('alt'), moon.column('az'), [threshold.altitude for threshold in THRESHOLDS])
+    solved = refine_crossings(upper_limb, seconds - SEARCH_SECONDS, seconds + SEARCH_SECONDS, tolerance=0.1)
+    # A grazing rise and set may not both reach the horizon; keep the table's times.
+    seconds = np.where(np.isnan(solved), seconds, solved)
+    _, az, _ = observe(seconds).altaz()
+    events = crossing_events(THRESHOLDS, which, seconds, rising, az.degrees)
+    events += transit_events(observe, moon.column('az'))
+    names = [name for threshold in THRESHOLDS for name in threshold[1:]] + ['Transit', 'Culmination']
+    write_events(HORIZON_EVENTS, moon.header, events, names, len(moon))
+    if verbose:
+        print(len(events), "horizon events")
 
 
 def build_my_moon_position_data():
@@ -272,7 +464,7 @@ def build_my_moon_position_data():
 
 def main():
     """Print the Moon and horizon event data for today."""
-    print(load_moon().now())
+    print(load_moon(lazy=True).now())
     for ev in load_moon_events().today():
         print(ev)
 
@@ -9,5 +9,6 @@ setup(
     license='MIT',
     url='http://mhsundstrom.com/',
     packages=['scioto', 'sky'],
+    py_modules=['minute_moon'],
     include_package_data=True,
 )
@@ -1 +1,6 @@
-from .api import Sky
+def __getattr__(name):
+    # `Sky` brings in astropy and scipy; the tables don't need them.
+    if name == 'Sky':
+        from .api import Sky
+        return Sky
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,8 @@
-import astropy.units as u
+import datetime
 
-from . import Sky
-from .api import Phase, Motions
+import pytz
+
+from minute_moon import load_moon
 from scioto import timesince, timeuntil
 
 
@@ -10,64 +11,59 @@ MOON_MINIMUM_PERIGEE = 221_504
 MOON_MAXIMUM_APOGEE = 252_766
 UNICODE_MOON_PHASES = 0x1f311
 
-INT_TO_PHASE = {
-    0: Phase.NewMoon,
-    1: Phase.FirstQuarter,
-    2: Phase.FullMoon,
-    3: Phase.LastQuarter,
+QUARTER_NAMES = {
+    0: 'New Moon',
+    1: 'First Quarter',
+    2: 'Full Moon',
+    3: 'Last Quarter',
 }
 
 
 def moon():
-    """Summary of the current position of the Moon."""
-    sky = Sky()
-    now = sky.now()
+    """
+    Summary of the current position of the Moon, looked up in the
+    Moon table (see `minute_moon.SUMMARY_COLUMNS`) without loading
+    the ephemeris.
+    """
+    table = load_moon(lazy=True)
+    now = datetime.datetime.now(pytz.utc)
     fmt = '%A, %-d %B at %H:%M:%S %Z'
-    print(f"The Moon at {now.astimezone(sky.tz):{fmt}}")
-    print("From location:", sky.home.positives[-1])
-
-    moon_apparent = sky.home.at(now).observe(sky.moon).apparent()
-    ra, dec, _ = moon_apparent.radec(epoch='date')
-    print(f"R.A. {ra}, Declination {dec}")
-
-    # Use the geocentric distance
-    centered = sky.earth.at(now).observe(sky.moon)
-    distance = centered.distance().to(u.imperial.mile)
-    distance_percentage = (distance.value - MOON_MINIMUM_PERIGEE) / (MOON_MAXIMUM_APOGEE - MOON_MINIMUM_PERIGEE)
-    speed = centered.speed().to(Sky.mph)
-    print(f"{distance:,.0f}, [{distance_percentage:.2%}], {speed:,.0f}")
-
-    alt, az, _ = moon_apparent.altaz('standard')
-    if alt.degrees >= 0:
-        print(f"Above the horizon: Altitude {alt} at Azimuth {az}")
+    print(f"The Moon at {now.astimezone(table.tz):{fmt}}")
+    latitude = f"{abs(table.latitude):.4f}° {'N' if table.latitude >= 0 else 'S'}"
+    longitude = f"{abs(table.longitude):.4f}° {'E' if table.longitude >= 0 else 'W'}"
+    print(f"From location: {latitude}, {longitude}")
+
+    summary = table.summary(now)
+    distance_percentage = (summary.distance - MOON_MINIMUM_PERIGEE) / (MOON_MAXIMUM_APOGEE - MOON_MINIMUM_PERIGEE)
+    print(f"{summary.distance:,.0f} mi, [{distance_percentage:.2%}], {summary.speed:,.0f} mi / h")
+
+    position = table.at_time(now)
+    if position.alt >= 0:
+        print(f"Above the horizon: Altitude {position.alt:.1f}° at Azimuth {position.az:.1f}°")
     else:
         print("Below the horizon.")
 
-    # Figure out the phases.
-    sun_longitude = sky.earth.at(now).observe(sky.sun).ecliptic_latlon()[1]
-    moon_longitude = sky.earth.at(now).observe(sky.moon).ecliptic_latlon()[1]
-    phase = divmod(moon_longitude.degrees - sun_longitude.degrees, 360)[1]
+    # The phases, from the table as well.
+    phase = summary.phase
     index = (int(phase + 22.5) // 45) % 8
     ch = chr(UNICODE_MOON_PHASES + index)
-    print(f"Phase: {phase:3.0f}° {ch}")
-    ip = ((int(phase) // 90) + 1) % 4
-    next_phase = INT_TO_PHASE[ip]
-    previous_phase = INT_TO_PHASE[(ip - 1) % 4]
+    print(f"Phase: {phase:3.0f}° {ch} {summary.illumination:.0%} illuminated")
+    previous, following = table.quarters(now)
 
-    phase_date = sky.find_moon_phase(now.tt, Motions.Previous, previous_phase)
-    print(f"{previous_phase:18} {phase_date.astimezone(sky.tz):{fmt}}", end=', ')
-    print(f"{timesince(phase_date.astimezone(sky.tz))} ago")
+    if previous is not None:
+        quarter, phase_date = previous
+        print(f"{QUARTER_NAMES[quarter]:18} {phase_date.astimezone(table.tz):{fmt}}", end=', ')
+        print(f"{timesince(phase_date.astimezone(table.tz))} ago")
 
-    if previous_phase == Phase.NewMoon:
-        phase_age = 24 * (sky.now() - phase_date)
-        if phase_age < 72:
-            print(f"The Moon is {phase_age:.0f} hours old.")
+        if quarter == 0:
+            phase_age = (now - phase_date) / datetime.timedelta(hours=1)
+            if phase_age < 72:
+                print(f"The Moon is {phase_age:.0f} hours old.")
 
-    phase_date = sky.find_moon_phase(now.tt, Motions.Next, next_phase)
-    print(f"{next_phase:18} {phase_date.astimezone(sky.tz):{fmt}}", end=', ')
-    print(f"in {timeuntil(phase_date.astimezone(sky.tz))}")
+    if following is not None:
+        quarter, phase_date = following
+        print(f"{QUARTER_NAMES[quarter]:18} {phase_date.astimezone(table.tz):{fmt}}", end=', ')
+        print(f"in {timeuntil(phase_date.astimezone(table.tz))}")
 
 
 moon()
-
-
@@ -0,0 +1,229 @@
+""" Minute-by-minute positions of any number of bodies on one time grid.
+
+    The expensive part of a Skyfield position is observing the body: the
+    light-time iteration and the apparent place. Those change smoothly,
+    so each body's apparent right ascension and declination are only
+    calculated every `SAMPLE_MINUTES` and interpolated with a cubic
+    spline. The sidereal time of every minute, and everything else about
+    the observer, is calculated once for all the bodies; each body then
+    costs little more than a rotation to the horizon for every minute.
+
+    A table of several bodies has an altitude and an azimuth column for
+    each, e.g. `moon_alt` and `moon_az`; `BodyMinuteTable.body(name)`
+    presents one of them as a `MinuteTable`.
+
+    `transit_events` refines the transits found in any body's table to
+    the second, for its event table.
+"""
+import datetime
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+from skyfield.api import Topos
+from skyfield.earthlib import refract
+
+from scioto import lazyproperty
+from .table import (
+    Column, MinuteTable, Position, ZonedTable, MINUTES_PER_DAY, compute_table_in_parallel, find_transits,
+    refine_crossings,
+)
+
+
+SAMPLE_MINUTES = 30  # Spacing of the full apparent position calculations
+CHUNK_DAYS = 31  # Days computed together as one `Time` array
+TRANSIT_SECONDS = 600  # The search on either side of a transit found in a table
+CULMINATION_SECONDS = 3600  # The search for the highest point, either side of the transit
+STEP_SECONDS = 30  # Half the step over which the altitude's rate of change is taken
+
+__all__ = ['compute_altaz', 'transit_events', 'BodyMinuteTable', 'create_body_table']
+
+
+def standard_refraction(elevation):
+    """The (temperature, pressure) of altaz('standard') at an elevation in meters"""
+    return 10.0, 1010.0 * np.exp(-elevation / 9.1e3)
+
+
+def short_name(name):
+    """The name used for a body's columns, e.g. 'jupiter barycenter' -> 'jupiter'"""
+    return name.split()[0].lower()
+
+
+def compute_altaz(ts, home, topos, bodies, start, minutes, refraction=True):
+    """
+    The altitude and azimuth, in degrees, of each of `bodies` at each of
+    `minutes` (UTC minutes after the datetime `start`) as seen from `home`
+    (the Earth plus `topos`). Returns a list of (alt, az) arrays, one pair
+    for each body, with the standard refraction unless `refraction` is False.
+    """
+    def utc(minute):
+        return ts.utc(start.year, start.month, start.day, 0, minute)
+
+    every_minute = utc(minutes)
+    samples = utc(np.arange(minutes.min(), minutes.max() + 2 * SAMPLE_MINUTES, SAMPLE_MINUTES))
+    observer = home.at(samples)
+
+    # Shared by every body
+    tt = every_minute.tt
+    gast = every_minute.gmst + np.interp(tt, samples.tt, samples.gast - samples.gmst)
+    local_sidereal = np.radians(gast * 15) + topos.longitude.radians
+    latitude = topos.latitude.radians
+    if refraction:
+        refraction = standard_refraction(topos.elevation.m)
+
+    positions = []
+    for body in bodies:
+        ra, dec, _ = observer.observe(body).apparent().radec(epoch='date')
+        ra = CubicSpline(samples.tt, np.unwrap(ra.radians))(tt)
+        dec = CubicSpline(samples.tt, dec.radians)(tt)
+        hour_angle = local_sidereal - ra
+        alt = np.degrees(np.arcsin(
+            np.sin(latitude) * np.sin(dec) + np.cos(latitude) * np.cos(dec) * np.cos(hour_angle)))
+        az = np.degrees(np.arctan2(
+            -np.cos(dec) * np.sin(hour_angle),
+            np.sin(dec) * np.cos(latitude) - np.cos(dec) * np.sin(latitude) * np.cos(hour_angle))) % 360
+        if refraction:
+            alt = refract(alt, *refraction)
+        positions.append((alt, az))
+    return positions
+
+
+def transit_events(observe, azimuths):
+    """
+    The transits of a body and the highest point of each of its daily
+    paths, found in its minute-by-minute `azimuths` and refined to a
+    tenth of a second. `observe(seconds)` is the body's apparent
+    position, as a Skyfield `Apparent`, at an array of seconds after the
+    start of the table.
+
+    A transit is when the hour angle is 0, and the culmination is when
+    the altitude stops rising. The culmination of the Sun is only seconds
+    from its transit, but the Moon's can be minutes away. All the events
+    are refined together, with one call of `observe` for each iteration
+    (see `sky.table.refine_crossings`). When there's no highest point
+    near a transit, as in the polar summer, the transit stands in for it.
+
+    Returns a list of (UTC seconds after the start, name, azimuth)
+    events, 'Transit' and 'Culmination', for `sky.table.write_events`.
+    """
+    found = find_transits(azimuths)
+
+    def hour_angle(seconds):
+        hours, _, _ = observe(seconds).hadec()
+        return hours.hours
+
+    transit = refine_crossings(hour_angle, found - TRANSIT_SECONDS, found + TRANSIT_SECONDS, tolerance=0.1)
+    transit = np.where(np.isnan(transit), found, transit)
+
+    def rising(seconds):
+        alt, _, _ = observe(np.concatenate([seconds - STEP_SECONDS, seconds + STEP_SECONDS])).altaz()
+        before, after = np.split(alt.degrees, 2)
+        return after - before
+
+    culmination = refine_crossings(
+        rising, transit - CULMINATION_SECONDS, transit + CULMINATION_SECONDS, tolerance=0.1)
+    culmination = np.where(np.isnan(culmination), transit, culmination)
+
+    seconds = np.concatenate([transit, culmination])
+    _, az, _ = observe(seconds).altaz()
+    names = ['Transit'] * len(transit) + ['Culmination'] * len(culmination)
+    return list(zip(np.round(seconds).astype(int).tolist(), names,
+                    (np.round(az.degrees).astype(int) % 360).tolist()))
+
+
+def body_columns(names):
+    return tuple(Column(f"{short_name(name)}_{value}") for name in names for value in ('alt', 'az'))
+
+
+def start_worker(latitude, longitude, elevation, names, start, refraction):
+    """Set up a warm `Sky` once in each worker process."""
+    from . import Sky
+    topos = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+    sky = Sky(location=topos)
+    return sky, [sky.planets[name] for name in names], start, refraction
+
+
+def compute_positions_for_days(worker, first_day, days):
+    """
+    Calculate the positions of every body for every minute of a block
+    of days, a chunk of `CHUNK_DAYS` at a time.
+    """
+    sky, bodies, start, refraction = worker
+    first = start + datetime.timedelta(days=first_day)
+    minutes = np.arange(days * MINUTES_PER_DAY)
+    values = np.empty((2 * len(bodies), len(minutes)))
+    chunk = CHUNK_DAYS * MINUTES_PER_DAY
+    for row in range(0, len(minutes), chunk):
+        rows = slice(row, row + chunk)
+        positions = compute_altaz(sky.ts, sky.home, sky.topos, bodies, first, minutes[rows], refraction)
+        values[:, rows] = [column for alt_az in positions for column in alt_az]
+    return values
+
+
+def create_body_table(path, names, *, latitude, longitude, elevation=0, tz='UTC',
+                      start, days, refraction=True, max_workers=None):
+    """
+    Calculate the positions of the bodies `names` (as in `Sky.planets`,
+    e.g. 'sun', 'moon', 'mars', 'jupiter barycenter') for every minute
+    of `days` days from the UTC midnight `start`, and save them to `path`.
+    """
+    header = {
+        'body': 'bodies',
+        'bodies': [short_name(name) for name in names],
+        'names': list(names),
+        'latitude': latitude,
+        'longitude': longitude,
+        'elevation': elevation,
+        'tz': str(tz),
+        'year': start.year,
+        'refraction': bool(refraction),
+        'start': f"{start:%Y-%m-%dT%H:%M}",
+    }
+    return compute_table_in_parallel(
+        path, header, body_columns(names),
+        setup=start_worker, setup_args=(latitude, longitude, elevation, list(names), start, refraction),
+        compute=compute_positions_for_days, days=days, block_days=CHUNK_DAYS, max_workers=max_workers)
+
+
+class BodyTable(MinuteTable):
+    """The positions of one of the bodies in a `BodyMinuteTable`."""
+    position_class = Position
+
+    def __init__(self, header, columns, tz=None, name=None):
+        super().__init__(header, columns, tz)
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.name} positions: {len(self):,} minutes>"
+
+
+class BodyMinuteTable(ZonedTable):
+    """
+    Minute-by-minute positions of several bodies, made by
+    `create_body_table`, all on the same UTC grid.
+
+        >>> table = BodyMinuteTable(*read_table(path))
+        >>> table.body('mars').now()
+    """
+    def __init__(self, header, columns, tz=None):
+        super().__init__(header, columns, tz)
+        self.bodies = header['bodies']
+
+    def __repr__(self):
+        return f"<Positions of {', '.join(self.bodies)}: {self.span:,} minutes>"
+
+    def __len__(self):
+        return self.span
+
+    @lazyproperty
+    def _tables(self):
+        return {}
+
+    def body(self, name):
+        """The table of one body, by its short name, e.g. 'mars'"""
+        name = short_name(name)
+        if name not in self.bodies:
+            raise KeyError(f"{name} is not in the table")
+        if name not in self._tables:
+            columns = {'alt': self.columns[f"{name}_alt"], 'az': self.columns[f"{name}_az"]}
+            self._tables[name] = BodyTable(self.header, columns, self.tz, name=name)
+        return self._tables[name]
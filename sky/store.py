@@ -0,0 +1,121 @@
+""" Minute-by-minute Sun tables for many sites at once.
+
+    Each site's table is kept as a file in one directory, named for its
+    location and year, and is built in the background the first time
+    it is asked for. Only the most recently used tables stay open.
+"""
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from .sun import Sun, build_sun_table
+from .table import read_table
+
+
+__all__ = ['SunTableStore']
+
+
+class SunTableStore:
+    """
+    Sun tables keyed by (latitude, longitude, elevation, tz).
+
+    The tables are keyed by UTC, so one file serves a location in every
+    time zone; the time zone only chooses how local times are read.
+    At most `max_tables` tables are kept open, dropping the least
+    recently used. Missing tables are built by a pool of `max_workers`
+    processes, so waiting for a new site never holds up the others.
+    """
+    def __init__(self, directory, max_tables=16, max_workers=None, year=None):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_tables = max_tables
+        self.max_workers = max_workers
+        self.year = year
+        self._tables = OrderedDict()
+        self._building = {}
+        self._executor = None
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"<SunTableStore {self.directory}: {len(self)} of {self.max_tables} tables open>"
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the pool of table builders"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @staticmethod
+    def key(latitude, longitude, elevation=0, tz='UTC'):
+        """Locations are rounded to about 10 m"""
+        return round(latitude, 4), round(longitude, 4), round(elevation), str(tz)
+
+    def path(self, latitude, longitude, elevation=0):
+        """The file holding the table for a location"""
+        latitude, longitude, elevation, _ = self.key(latitude, longitude, elevation)
+        return self.directory / f"sun{latitude:+.4f}{longitude:+.4f}{elevation:+d}m-{self.table_year}.bin"
+
+    @property
+    def table_year(self):
+        """The year of the tables, by default the current year"""
+        return datetime.date.today().year if self.year is None else self.year
+
+    def prefetch(self, latitude, longitude, elevation=0):
+        """
+        Start building the table for a location, unless it exists already.
+        Returns a `Future` for the path of the table.
+        """
+        path = self.path(latitude, longitude, elevation)
+        with self._lock:
+            future = self._building.get(path)
+            if future is not None:
+                return future
+            if path.exists():
+                future = Future()
+                future.set_result(path)
+                return future
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            latitude, longitude, elevation, _ = self.key(latitude, longitude, elevation)
+            future = self._executor.submit(
+                build_sun_table, path,
+                latitude=latitude, longitude=longitude, elevation=elevation, year=self.table_year)
+            self._building[path] = future
+        future.add_done_callback(lambda _: self._built(path))
+        return future
+
+    def _built(self, path):
+        with self._lock:
+            self._building.pop(path, None)
+
+    def get(self, latitude, longitude, elevation=0, tz='UTC', timeout=None):
+        """
+        The `Sun` table for a location, with local times in `tz`.
+        If the table has to be built first, wait up to `timeout` seconds.
+        """
+        key = self.key(latitude, longitude, elevation, tz)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        path = self.prefetch(latitude, longitude, elevation).result(timeout)
+        table = Sun(*read_table(path), tz=tz)
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
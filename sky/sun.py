@@ -3,76 +3,114 @@
     once and then reuse them for many different purposes.
 
     Here we will calculate the Sun's position for every minute throughout
-    the year and save it as a JSON file (15.4 MB) for later use.
+    the year and save it as a binary table (about 2 MB, see `sky.table`)
+    for later use.
 """
 import os
 import datetime
 import json
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import lru_cache
-from bisect import bisect_right
-from collections import UserList
+from collections import namedtuple
 import time
 
 from skyfield.api import Topos
+import numpy as np
 import pytz
-from scioto import pairwise
-from . import Sky
+from scioto import lazyproperty
+from . import Sky, bodies, table
+from .bodies import standard_refraction
+from .table import (
+    Column, MinuteTable, EventTable, Event, ZonedTable, Threshold, MINUTES_PER_DAY, MINUTE,
+    write_table, read_table, write_events, crossing_events, crossing_arrays, refine_crossings,
+    pack_positions, compute_table_in_parallel, SharedTable, attach_table, fit_chebyshev,
+    write_chebyshev,
+)
 
 
 TWILIGHT = -6
-
-
-# TODO Add a call for a specific day that returns rise, set, day length, both azimuths
-
-__all__ = ['load_sun', 'load_events']
-
-
-@lru_cache(maxsize=1)
-def load_sun():
+THRESHOLDS = (
+    Threshold(0, 'Rise', 'Set'),
+    Threshold(TWILIGHT, 'Dawn', 'Dusk'),
+    Threshold(-12, 'Nautical Dawn', 'Nautical Dusk'),
+    Threshold(-18, 'Astronomical Dawn', 'Astronomical Dusk'),
+    Threshold(6, 'Golden Hour End', 'Golden Hour'),
+)
+CHUNK_DAYS = 31  # Days computed together as one `Time` array
+# On either side of a crossing found in the table, widened where the Sun
+# moves too slowly near the threshold for its crossing to be bracketed.
+SEARCH_SECONDS = (300, 1800)
+
+__all__ = ['load_sun', 'load_events', 'share_sun']
+
+
+POSITION_COLUMNS = (Column('alt'), Column('az'))
+
+# The daily summary: event times are UTC seconds after the start of the year.
+DAY_COLUMNS = (
+    Column('dawn', '<i4', 1), Column('rise', '<i4', 1), Column('noon', '<i4', 1),
+    Column('set', '<i4', 1), Column('dusk', '<i4', 1), Column('max_alt'),
+    Column('day_length', '<i4', 1), Column('rise_az'), Column('set_az'),
+)
+NO_EVENT = -2 ** 31  # The time of an event that doesn't happen that day
+
+
+@lru_cache(maxsize=2)
+def load_sun(lazy=False, shared=None):
+    """
+    The Sun table. Scripts that only look up a few minutes can
+    load it `lazy`, reading just the months they use. The workers
+    of a server can open the copy made by `share_sun()` by its name.
+    """
+    if shared is not None:
+        return Sun(*attach_table(shared))
     sky = Sky()
     sun_position = Path(sky.parser['sun']['sun_position']).expanduser()
     assert sun_position.exists(), f"You must create {sun_position.name} first!"
-    data = json.loads(sun_position.read_text())
-    return Sun(data)
+    sun = Sun(*read_table(sun_position, lazy))
+    daily_summary = daily_summary_path()
+    if daily_summary.exists():
+        solar_days = SolarDays(*read_table(daily_summary))
+        if solar_days.header['start'] == sun.header['start'] and solar_days.span == len(sun):
+            sun.solar_days = solar_days
+    return sun
+
+
+def share_sun():
+    """
+    Copy the Sun table into shared memory, once, in the parent process
+    of a pre-fork server (e.g. gunicorn's `on_starting` hook). Each
+    worker then calls `load_sun(shared=table.name)`. Keep the returned
+    `SharedTable` and `close()` it when the server shuts down.
+    """
+    sun_position = sun_position_path()
+    assert sun_position.exists(), f"You must create {sun_position.name} first!"
+    return SharedTable(sun_position)
 
 
 @lru_cache(maxsize=1)
 def load_events():
-    sky = Sky()
-    horizon_events = Path(sky.parser['sun']['horizon_events']).expanduser()
+    horizon_events = horizon_events_path()
     assert horizon_events.exists(), f"You must create {horizon_events.name} first!"
-    return SunEvents(json.loads(horizon_events.read_text()))
+    return SunEvents(*read_table(horizon_events))
 
 
-class Position:
-    """
-    Wraps the Sun position info into a friendlier format
-    that looks better both on the command line and in the Notebook.
-    """
-    def __init__(self, value, index, year=None):
-        if year is None:
-            year = datetime.date.today().year
-        self.date = datetime.datetime(year, *value[:4])
-        self.alt = value[4]
-        self.az = value[5]
-        self.index = index
+def matching_events(sun):
+    """The horizon events, if they've been made from the same place and year as `sun`, else None"""
+    if not horizon_events_path().exists():
+        return None
+    events = load_events()
+    same = ('start', 'latitude', 'longitude', 'elevation')
+    return events if all(events.header.get(key) == sun.header.get(key) for key in same) else None
 
-    def __repr__(self):
-        return "{0.date:%A %-d %b %-H:%M} Alt={0.alt:.0f}° Az={0.az:.0f}°".format(self)
 
-    def _repr_html_(self):
-        """Having fun with display in the Jupyter Notebook"""
-        # Yellow Sun = 0x1f31e, Black Sun = 0x2600
-        if self.alt > 0:
-            tag, front, behind = 'b', '&#x1f31e;', ''  # yellow sun, bold text
-        else:
-            tag, front, behind = 'em', '', '&#x2600;'  # black sun, italic text
-        return f"{front}<{tag}>{self!r}</{tag}>{behind}"
+class Position(table.Position):
+    """A minute's position of the Sun"""
+    __slots__ = ()
+    glyphs = ('&#x1f31e;', '&#x2600;')  # Yellow Sun, Black Sun
 
 
-class Sun(UserList):
+class Sun(MinuteTable):
     """
     Minute-by-minute positions of the Sun for an entire year.
 
@@ -81,94 +119,116 @@ class Sun(UserList):
 
     now() return the tuple associated with the current time.
 
-    at(*args) searches for the specified info.
+    at(*args) looks up the specified info.
     """
+    position_class = Position
+    periodic = True  # The Sun's positions repeat from year to year
+
     def __repr__(self):
         return f"{len(self):,} minute-by-minute Sun positions"
 
-    def __getitem__(self, index):
-        """Returns the Position at the specified index"""
-        return Position(self.data[index], index)
-
-    def at(self, *args):
+    @lazyproperty
+    def solar_days(self):
         """
-        Returns the `Position` of the Sun at a specified
-        (month, day, hour, minute). You can
-        use up to 4 arguments, depending on how close you want to specify.
+        The `SolarDays` summary of each day. `load_sun` supplies the one
+        saved by `create_daily_summary`; otherwise it's calculated now.
         """
-        index = bisect_right(self.data, list(args))
-        if index:
-            return self[index]
-        raise ValueError
+        header, values = summarize_days(self, matching_events(self))
+        return SolarDays(header, {column.name: (column, column.encode(values[column.name]))
+                                  for column in DAY_COLUMNS})
+
+    def day(self, date):
+        """The dawn, sunrise, noon, sunset and dusk, etc. of a date"""
+        return self.solar_days.day(date)
+
 
-    def now(self):
-        """Return the `Position` of the Sun at the current time"""
-        date = datetime.datetime.now()
-        return self.at(date.month, date.day, date.hour, date.minute)
+class DayEvents(table.DayEvents):
+    title = 'Sun Events'
 
 
-class SunEvents(UserList):
+class SunEvents(EventTable):
     """
     A list of sunrise, sunset, and civil twilight events for the entire year.
     """
+    event_class = Event
+    periodic = True
+
     def __repr__(self):
         return f"<Sun: {len(self):,} Events>"
 
-    def at(self, *args):
-        index = bisect_right(self.data, tuple(args))
-        return Event(self[index])
-
     def on_date(self, date):
-        key = [date.month, date.day]
-        index = bisect_right(self.data, key)
-        return [
-            Event(value, datetime.date.today().year)
-            for value in self[index:]
-            if value[:2] == key
-        ]
+        return self.on(date)
 
     def today(self):
         """Returns a list of the events for the current date"""
-        date = datetime.date.today()
-        key = [date.month, date.day]
-        index = bisect_right(self.data, key)
-        return DayEvents([
-            Event(value, date.year)
-            for value in self[index:]
-            if value[:2] == key
-        ])
-
-
-class DayEvents(UserList):
-    """Wraps all events for a given day."""
-    def _repr_html_(self):
-        s = []
-        a = s.append
-        a(f"<h2>Sun Events on {self[0].date:%A, %-d %B %Y}</h2>")
-        a(f"<ul>")
-        for ev in self:
-            a(f"<li>{ev!s}</li>")
-        a("</ul>")
-        return ''.join(s)
-
-
-class Event:
-    def __init__(self, value, year=None):
-        if year is None:
-            year = datetime.date.today().year
-        self.date = datetime.datetime(year, *value[:4])
-        self.name = value[4]
-        self.az = value[5]
+        return DayEvents(self.on(datetime.datetime.now(self.tz).date()))
 
-    def __repr__(self):
-        return f"{self.date:%a %d %b %H:%M} {self.name} {self.az}°"
+
+class SolarDay(namedtuple('SolarDay', 'date dawn rise noon set dusk max_alt day_length rise_az set_az')):
+    """
+    The summary of one day: local datetimes of civil dawn, sunrise, solar
+    noon, sunset and civil dusk (None when they don't happen; sunrise and
+    sunset are when the center of the Sun crosses the horizon, allowing
+    for refraction), the Sun's highest altitude, the length of the day
+    and the azimuths of sunrise and sunset. The times are those of the
+    horizon events when they were made for the same table, otherwise
+    they're found in its minutes, to within half a minute or so.
+    """
+    __slots__ = ()
 
     def __str__(self):
-        if self.name in ('Rise', 'Set'):  # suppress azimuth for twilight events
-            az = f"@{self.az}°"
-        else:
-            az = ''
-        return f"{self.date:%-H:%M} {self.name} {az}"
+        def time(when):
+            return '--:--' if when is None else f"{when:%-H:%M}"
+        hours, seconds = divmod(int(self.day_length.total_seconds()), 3600)
+        return (f"{self.date:%a %-d %b}: Dawn {time(self.dawn)} Rise {time(self.rise)} "
+                f"Noon {time(self.noon)} Set {time(self.set)} Dusk {time(self.dusk)}, "
+                f"{hours}h{seconds // 60:02d}m, max {self.max_alt:.1f}°")
+
+
+class SolarDays(ZonedTable):
+    """
+    One row for each local day of the year, made by `summarize_days`,
+    so looking up a day is a matter of indexing. Like the Sun table,
+    it serves any year, with that year's clock changes; 29 February is
+    taken to be the 28th.
+    """
+    periodic = True
+
+    @property
+    def span(self):
+        return self.header['span']
+
+    def __len__(self):
+        return self.header['rows']
+
+    def __repr__(self):
+        return f"<Sun: {len(self)} days>"
+
+    def day(self, date):
+        """The `SolarDay` for a date; any year will do"""
+        try:
+            index = self._day_number[date.month, date.day]
+        except KeyError:
+            raise ValueError(f"{date} is not in the table") from None
+        midnight = datetime.datetime(date.year, date.month, date.day)
+        zone = self.zone_in(date.year)
+        values = {name: column.decode(raw[index]) for name, (column, raw) in self.columns.items()}
+
+        def local(name):
+            seconds = int(self.columns[name][1][index])
+            if seconds == NO_EVENT:
+                return None
+            minute, second = divmod(seconds, 60)
+            local_minute = int(zone.to_local(minute)) - index * MINUTES_PER_DAY
+            return midnight + local_minute * MINUTE + datetime.timedelta(seconds=second)
+
+        rise, set_ = local('rise'), local('set')
+        return SolarDay(
+            date=midnight.date(), dawn=local('dawn'), rise=rise, noon=local('noon'),
+            set=set_, dusk=local('dusk'), max_alt=float(values['max_alt']),
+            day_length=datetime.timedelta(seconds=int(values['day_length'])),
+            rise_az=None if rise is None else float(values['rise_az']),
+            set_az=None if set_ is None else float(values['set_az']))
 
 
 """
@@ -178,95 +238,330 @@ or perhaps for a new geographic location.
 """
 
 
-def position(jd, alt, az, tz):
-    """Returns a convenient tuple for the calculated Sun position."""
-    date = jd.astimezone(tz=tz)
-    return date.month, date.day, date.hour, date.minute, round(alt, 1), round(az, 1)
+def compute_altaz(sky, start, minutes, refraction=True):
+    """
+    The altitude and azimuth of the Sun, in degrees, at each of `minutes`
+    (UTC minutes after the datetime `start`) as seen from `sky.home`,
+    with the standard refraction unless `refraction` is False.
+    See `sky.bodies.compute_altaz`.
+    """
+    (alt, az), = bodies.compute_altaz(sky.ts, sky.home, sky.topos, [sky.sun], start, minutes, refraction)
+    return alt, az
+
+
+def compute_positions_for_span(sky, start, days, refraction=True):
+    """
+    Calculate the position of the Sun for every minute of `days` days,
+    beginning at the UTC midnight `start`, one chunk of `CHUNK_DAYS`
+    at a time in a single process.
+    """
+    minutes = np.arange(days * MINUTES_PER_DAY)
+    alt, az = np.empty(len(minutes)), np.empty(len(minutes))
+    chunk = CHUNK_DAYS * MINUTES_PER_DAY
+    for first in range(0, len(minutes), chunk):
+        rows = slice(first, first + chunk)
+        alt[rows], az[rows] = compute_altaz(sky, start, minutes[rows], refraction)
+    return alt, az
+
+
+def write_sun_position(positions, *, latitude, longitude, elevation, tz, year):
+    """Save the calculated (month, day, hour, minute, alt, az) positions."""
+    start = datetime.datetime(year, 1, 1)
+    days = (datetime.datetime(year + 1, 1, 1) - start).days
+    alt, az = pack_positions(positions, start, days, pytz.timezone(str(tz)))
+    return save_sun_position(
+        alt, az, latitude=latitude, longitude=longitude,
+        elevation=elevation, tz=tz, year=year)
+
+
+def save_sun_position(alt, az, path=None, **kwargs):
+    """Save the altitude and azimuth columns for a year as a binary table."""
+    sun_position = sun_position_path() if path is None else Path(path)
+    write_table(sun_position, sun_header(**kwargs), zip(POSITION_COLUMNS, (alt, az)))
+    return sun_position
 
 
-def compute_positions_for_date(date, *, latitude, longitude, elevation=0, tz):
-    """Calculate the position of the Sun for every minute of the specified date."""
-    topos = Topos(
-        latitude_degrees=latitude,
-        longitude_degrees=longitude,
-        elevation_m=elevation
-    )
+def sun_position_path():
+    sky = Sky()
+    return Path(sky.parser['sun']['sun_position']).expanduser()
+
+
+def horizon_events_path():
+    sky = Sky()
+    return Path(sky.parser['sun']['horizon_events']).expanduser()
+
+
+def sun_header(*, latitude, longitude, elevation, tz, year):
+    return {
+        'body': 'sun',
+        'latitude': latitude,
+        'longitude': longitude,
+        'elevation': elevation,
+        'tz': str(tz),
+        'year': year,
+        'start': f"{year}-01-01T00:00",
+    }
+
+
+def convert_sun_position_json(path, year=None):
+    """
+    Convert a minute-by-minute JSON file made by an earlier version
+    into the binary table, using the home location and time zone.
+    """
+    sky = Sky()
+    positions = json.loads(Path(path).expanduser().read_text())
+    return write_sun_position(
+        positions,
+        latitude=sky.topos.latitude.degrees,
+        longitude=sky.topos.longitude.degrees,
+        elevation=sky.topos.elevation.km * 1000,
+        tz=sky.tz,
+        year=datetime.date.today().year if year is None else year)
+
+
+def build_sun_table(path, *, latitude, longitude, elevation=0, tz='UTC', year=None):
+    """
+    Calculate a year of Sun positions for any site in this process,
+    with `compute_positions_for_span`, and save them to `path`.
+    """
+    if year is None:
+        year = datetime.date.today().year
+    start = datetime.datetime(year, 1, 1)
+    days = (datetime.datetime(year + 1, 1, 1) - start).days
+    topos = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+    sky = Sky(location=topos, timezone=tz)
+    alt, az = compute_positions_for_span(sky, start, days)
+    return save_sun_position(
+        alt, az, path, latitude=latitude, longitude=longitude,
+        elevation=elevation, tz=tz, year=year)
+
+
+def build_sun_fit(path, *, latitude, longitude, elevation=0, tz='UTC', year=None):
+    """
+    Fit a year of Sun positions for any site with Chebyshev series, one
+    set for each day (see `sky.table.ChebyshevTable`), and save them to
+    `path`. About 75 KB, and accurate to better than 0.0001°.
+    """
+    if year is None:
+        year = datetime.date.today().year
+    start = datetime.datetime(year, 1, 1)
+    days = (datetime.datetime(year + 1, 1, 1) - start).days
+    topos = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
     sky = Sky(location=topos, timezone=tz)
+    alt, az = compute_positions_for_span(sky, start, days, refraction=False)
+    coefficients, error = fit_chebyshev(alt, az)
+    header = sun_header(latitude=latitude, longitude=longitude, elevation=elevation, tz=tz, year=year)
+    write_chebyshev(path, header, coefficients, segment_minutes=MINUTES_PER_DAY, max_error=error,
+                    refraction=standard_refraction(elevation), periodic=True)
+    return Path(path)
 
-    every_minute = sky.ts.utc(date.year, date.month, date.day, 0, range(1440))
+
+def start_worker(latitude, longitude, elevation, tz, start):
+    """Set up a warm `Sky` once in each worker process."""
+    topos = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+    return Sky(location=topos, timezone=tz), start
+
+
+def compute_positions_for_days(worker, first_day, days):
+    """
+    Calculate the position of the Sun for every minute of a block
+    of days, with a full Skyfield calculation for each minute.
+    """
+    sky, start = worker
+    first = start + datetime.timedelta(days=first_day)
+    every_minute = sky.ts.utc(first.year, first.month, first.day, 0, range(days * MINUTES_PER_DAY))
     alt, az, _ = sky.home.at(every_minute).observe(sky.sun).apparent().altaz('standard')
-    return [
-        position(jd, alt, az, sky.tz)
-        for jd, alt, az in zip(every_minute, alt.degrees, az.degrees)
-    ]
+    return alt.degrees, az.degrees
 
 
-def create_sun_minute_by_minute(*, latitude, longitude, elevation, tz):
+def create_sun_minute_by_minute(*, latitude, longitude, elevation, tz, parallel=False):
     """
     Compute Sun locations for every minute over an entire year.
-    Use `concurrent.futures` to calculate these days in parallel;
-    it speeds up the process a fair amount.
 
-    We do this new for each year, because of daylight savings time changes.
+    By default the whole year is calculated in this process, a month
+    at a time, using large `Time` arrays (see `compute_altaz`); this
+    takes about a second.
+
+    With `parallel=True`, use `concurrent.futures` to calculate blocks
+    of days with a full Skyfield calculation for every minute, each
+    worker writing straight into a shared memory table.
 
-    Most recently it took 54.5 seconds to calculate the minute-by-minute data.
+    The table is keyed by UTC, so it serves any time zone; `tz` is
+    only the default zone for looking things up in it.
     """
     print(latitude, longitude, elevation, tz)
     this_year = datetime.date.today().year
-    date = datetime.date(this_year, 1, 1)
-    one_year_later = date.replace(year=date.year + 1)
-    fs = []
-    results = []
+    start = datetime.datetime(this_year, 1, 1)
+    days = (datetime.datetime(this_year + 1, 1, 1) - start).days
+    location = dict(latitude=latitude, longitude=longitude, elevation=elevation, tz=tz)
     beginning = time.perf_counter()
-    with ProcessPoolExecutor() as ex:
-        while date < one_year_later:
-            fs.append(
-                ex.submit(
-                    compute_positions_for_date, date,
-                    latitude=latitude, longitude=longitude, elevation=elevation, tz=tz))
-            date += datetime.timedelta(days=1)
-        print(len(fs), "futures submitted.")
-        for counter, future in enumerate(as_completed(fs), start=1):
-            results.extend(future.result())
-            print(f"{counter:3}. {len(results):,}")
-    results.sort()
-    sky = Sky()
-    sun_position = Path(sky.parser['sun']['sun_position']).expanduser()
-    sun_position.write_text(json.dumps(results))
+    if parallel:
+        sun_position = compute_table_in_parallel(
+            sun_position_path(), sun_header(year=this_year, **location), POSITION_COLUMNS,
+            setup=start_worker, setup_args=(latitude, longitude, elevation, tz, start),
+            compute=compute_positions_for_days, days=days)
+    else:
+        sun_position = build_sun_table(sun_position_path(), year=this_year, **location)
     print(f"{sun_position!s}: {sun_position.stat().st_size:,} bytes.")
     print(f"Elapsed time {time.perf_counter() - beginning:.1f} seconds")
 
 
-def create_horizon_event_data():
-    """Sunrise, sunset, and civil twilight times"""
-    data = load_sun().data
-    events = []
-    for a, b in pairwise(data):
-        # Check for sunrise and sunset
-        if a[4] <= 0 < b[4]:
-            name = 'Rise'
-        elif a[4] > 0 >= b[4]:
-            name = 'Set'
-        else:
-            name = None
-        if name is not None:
-            rec = b[:4] + [name, int(b[-1])]
-            events.append(rec)
-
-        # Check for dawn and dusk
-        if a[4] <= TWILIGHT < b[4]:
-            name = 'Dawn'
-        elif a[4] > TWILIGHT >= b[4]:
-            name = 'Dusk'
-        else:
-            name = None
-        if name is not None:
-            rec = b[:4] + [name, int(b[-1])]
-            events.append(rec)
-    events.sort()
+def wrapped_rows(rows, pad):
+    """The rows of a table that wraps around, with `pad` rows from either end added to the other"""
+    return np.r_[np.arange(rows - pad, rows), np.arange(rows), np.arange(pad)]
+
+
+def summarize_days(sun, events=None):
+    """
+    Summarize each local day of a `Sun` table in one pass over its
+    minutes. Returns (header, values), `values` being a dict with an
+    array for each of the `DAY_COLUMNS`.
+
+    Dawn, sunrise, noon, sunset and dusk are taken from the horizon
+    `events` of the same table when they're given, being solved for to
+    the second; otherwise they're interpolated in the table's altitudes,
+    which are only kept to a tenth of a degree.
+
+    The table wraps around, so a day from either end is added to make
+    the first and last local days complete.
+    """
+    rows = len(sun)
+    pad = MINUTES_PER_DAY
+    extended = wrapped_rows(rows, pad)
+    alt, az = sun.alt[extended], sun.az[extended]
+    days = sun.days
+
+    # The altitude of every minute of each local day, and its highest point.
+    grid = sun.zone.to_utc(np.arange(days * MINUTES_PER_DAY)).reshape(days, MINUTES_PER_DAY) + pad
+    highest = np.argmax(alt[grid], axis=1)
+    peak = grid[np.arange(days), highest]
+    values = {'max_alt': alt[peak]}
+
+    # Sunrise and sunset, dawn and dusk: the first of each on each local day.
+    if events is None:
+        which, seconds, rising, crossing_az = crossing_arrays(alt, az, [0, TWILIGHT])
+        seconds -= pad * 60
+    else:
+        found = events.to_numpy()
+        event_seconds = (found['utc'] - np.datetime64(sun.start, 's')) / np.timedelta64(1, 's')
+        kinds = {}
+        for level, threshold in enumerate(THRESHOLDS[:2]):
+            kinds[threshold.rising], kinds[threshold.setting] = (level, True), (level, False)
+        chosen = np.flatnonzero(np.isin(found['name'], list(kinds)))
+        seconds = event_seconds[chosen]
+        which, rising = (np.array([kinds[name][i] for name in found['name'][chosen]]) for i in (0, 1))
+        # The azimuths are only stored to the degree, so take them from the table.
+        minutes = seconds / 60 + pad
+        before = np.floor(minutes).astype(np.int64)
+        turn = (az[before + 1] - az[before] + 180) % 360 - 180
+        crossing_az = (az[before] + (minutes - before) * turn) % 360
+    day = sun.zone.to_local(np.floor(seconds / 60).astype(np.int64)) // MINUTES_PER_DAY
+    for level, (up, down) in enumerate([('rise', 'set'), ('dawn', 'dusk')]):
+        for name, direction in ((up, True), (down, False)):
+            chosen = np.flatnonzero((which == level) & (rising == direction) & (0 <= day) & (day < days))
+            first_day, first = np.unique(day[chosen], return_index=True)
+            values[name] = np.full(days, NO_EVENT, dtype=np.int64)
+            values[name][first_day] = np.round(seconds[chosen[first]])
+            if level == 0:
+                values[name + '_az'] = np.zeros(days)
+                values[name + '_az'][first_day] = crossing_az[chosen[first]]
+
+    # Solar noon is when the azimuth crosses the meridian nearest the highest point.
+    window = peak[:, np.newaxis] + np.arange(-90, 91)
+    meridian = np.where(np.abs(az[peak] - 180) < 90, 180, 0)
+    offset = (az[window] - meridian[:, np.newaxis] + 180) % 360 - 180
+    crosses = (offset[:, 1:] >= 0) != (offset[:, :-1] >= 0)
+    distance = np.where(crosses, np.abs(np.arange(180) - 90), 180)
+    step = np.argmin(distance, axis=1)
+    ends = offset[np.arange(days), step], offset[np.arange(days), step + 1]
+    fraction = np.where(crosses.any(axis=1), ends[0] / (ends[0] - ends[1]), 90 - step)
+    values['noon'] = np.round((window[:, 0] + step + fraction - pad) * 60)
+    if events is not None:
+        transits = np.flatnonzero(found['name'] == 'Transit')
+        day = sun.zone.to_local(np.floor(event_seconds[transits] / 60).astype(np.int64)) // MINUTES_PER_DAY
+        inside = (0 <= day) & (day < days)
+        first_day, first = np.unique(day[inside], return_index=True)
+        values['noon'][first_day] = np.round(event_seconds[transits[inside][first]])
+
+    # The day length is from sunrise to sunset, or the minutes of daylight.
+    daylight = (alt[grid] > 0).sum(axis=1) * 60
+    both = (values['rise'] != NO_EVENT) & (values['set'] > values['rise'])
+    values['day_length'] = np.where(both, values['set'] - values['rise'], daylight)
+
+    header = dict(sun.header, tz=str(sun.tz), span=rows, rows=days,
+                  columns=[column.describe() for column in DAY_COLUMNS])
+    return header, values
+
+
+def daily_summary_path():
     sky = Sky()
-    horizon_events = Path(sky.parser['sun']['horizon_events']).expanduser()
-    horizon_events.write_text(json.dumps(events))
+    default = sun_position_path().with_name('sun-days.bin')
+    return Path(sky.parser.get('sun', 'daily_summary', fallback=str(default))).expanduser()
+
+
+def create_daily_summary():
+    """Dawn, sunrise, noon, sunset, dusk and day length for each day"""
+    sun = load_sun()
+    header, values = summarize_days(sun, matching_events(sun))
+    write_table(daily_summary_path(), header, [(column, values[column.name]) for column in DAY_COLUMNS])
+    print(len(values['noon']), "days summarized")
+
+
+def create_horizon_event_data(thresholds=THRESHOLDS, sun=None):
+    """
+    Sunrise, sunset, twilight and golden hour times, and solar noon:
+    the transit, and the culmination when the Sun is highest, to the
+    second (see `bodies.transit_events`).
+
+    Each crossing of the `thresholds` is found in the table's altitudes,
+    which are only kept to a tenth of a degree, then solved for to a
+    tenth of a second with the refracted altitude (see
+    `sky.table.refine_crossings`).
+
+    The table wraps around, so the events are found with a day from
+    either end added to the other, and those on each local date of the
+    year are kept. The events of the first and last local days may be
+    stored at UTC times just outside the table.
+    """
+    if sun is None:
+        sun = load_sun()
+    pad = MINUTES_PER_DAY
+    extended = wrapped_rows(len(sun), pad)
+    alt, az = sun.alt[extended], sun.az[extended]
+    header = sun.header
+    worker, start = start_worker(header['latitude'], header['longitude'], header['elevation'],
+                                 header['tz'], sun.start)
+
+    def observe(seconds):
+        t = worker.ts.utc(start.year, start.month, start.day, 0, 0, seconds - pad * 60)
+        return worker.home.at(t).observe(worker.sun).apparent()
+
+    which, seconds, rising, _ = crossing_arrays(alt, az, [threshold.altitude for threshold in thresholds])
+    for number, threshold in enumerate(thresholds):
+        crossing = which == number
+
+        def above(seconds, level=threshold.altitude):
+            altitude, _, _ = observe(seconds).altaz('standard')
+            return altitude.degrees - level
+
+        guess = seconds[crossing]
+        solved = np.full(len(guess), np.nan)
+        for search in SEARCH_SECONDS:
+            missing = np.flatnonzero(np.isnan(solved))
+            solved[missing] = refine_crossings(
+                above, guess[missing] - search, guess[missing] + search, tolerance=0.1)
+        # A grazing crossing may not be bracketed at all; keep the table's time for it.
+        seconds[crossing] = np.where(np.isnan(solved), guess, solved)
+    _, azimuths, _ = observe(seconds).altaz()
+    found = crossing_events(thresholds, which, seconds, rising, azimuths.degrees)
+    found += bodies.transit_events(observe, az)
+    events = []
+    for second, name, azimuth in found:
+        second -= pad * 60
+        if 0 <= sun.zone.to_local(second // 60) < sun.days * MINUTES_PER_DAY:
+            events.append((second, name, azimuth))
+    names = [name for threshold in thresholds for name in threshold[1:]] + ['Transit', 'Culmination']
+    write_events(horizon_events_path(), sun.header, events, names, len(sun))
     print(len(events), "horizon events")
 
 
@@ -282,7 +577,7 @@ def build_my_sun_position_data():
 
 def main():
     """Print the Sun and horizon event data for today."""
-    print(load_sun().now())
+    print(load_sun(lazy=True).now())
     for ev in load_events().today():
         print(ev)
 
@@ -290,4 +585,5 @@ def main():
 if __name__ == '__main__':
     # build_my_sun_position_data()  # only needed once
     # create_horizon_event_data()  # only needed once
+    # create_daily_summary()  # only needed once
     main()
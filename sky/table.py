@@ -0,0 +1,1518 @@
+""" A compact columnar binary format for minute-by-minute tables.
+
+    The file layout is:
+        8 bytes     magic number
+        4 bytes     length of the header (little-endian unsigned int)
+        header      UTF-8 JSON: location, tz, year, row count and the
+                    description of each column
+        columns     one contiguous array per column, each aligned
+                    to a 16-byte boundary
+
+    The row number is implicit: row `i` is UTC minute `i` after the
+    `start` given in the header, so there is no need to store the time
+    of each row. Keying by UTC means there are no repeated or missing
+    minutes when the clocks change, and one table serves every time zone:
+    local times are projected onto it when the table is queried.
+
+    Floating point values are stored as scaled integers, e.g. an
+    altitude of -12.3° is stored as the int16 -123 with a scale of 10.
+
+    Tables are opened with `mmap`, so opening one is nearly free and
+    the OS page cache is shared between every process reading the file.
+    A short-lived script can instead open a table `lazy`, which reads
+    each column a month at a time as it is needed.
+"""
+import datetime
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from collections import UserList, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pytz
+from skyfield.earthlib import refract
+
+from scioto import lazyproperty
+from .timezones import TimeZoneIndex, calendar_columns
+
+
+MAGIC = b'SCIOTO\x00\x02'
+ALIGNMENT = 16
+MINUTES_PER_DAY = 1440
+MINUTE = datetime.timedelta(minutes=1)
+START_FORMAT = '%Y-%m-%dT%H:%M'
+
+__all__ = [
+    'Column', 'Position', 'MinuteTable', 'Event', 'DayEvents', 'EventTable', 'EventView',
+    'write_table', 'TableWriter', 'read_table', 'MonthShards', 'SharedTable', 'attach_table',
+    'Threshold', 'write_events', 'crossing_events', 'crossing_arrays', 'refine_crossings',
+    'find_transits', 'pack_positions', 'compute_table_in_parallel', 'ChebyshevTable',
+    'fit_chebyshev', 'write_chebyshev',
+]
+
+
+class Column:
+    """Describes how one column of floating point values is stored."""
+    def __init__(self, name, dtype='<i2', scale=10):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.scale = scale
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.dtype.str!r}, scale={self.scale})"
+
+    def encode(self, values):
+        """Convert floating point values to the stored integers."""
+        values = np.asarray(values, dtype=float) * self.scale
+        if self.dtype.kind == 'f':
+            return values.astype(self.dtype)
+        return np.round(values).astype(self.dtype)
+
+    def decode(self, raw):
+        """Convert stored integers back to floating point values."""
+        return np.asarray(raw) / self.scale
+
+    def describe(self):
+        return {'name': self.name, 'dtype': self.dtype.str, 'scale': self.scale}
+
+
+EVENT_COLUMNS = (Column('time', '<i4', 1), Column('kind', '|u1', 1), Column('az', '<i2', 1))
+
+# An altitude, and the names of the events when rising and setting through it.
+Threshold = namedtuple('Threshold', 'altitude rising setting')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(header):
+    """Yields (Column, offset) for each column described in the header."""
+    offset = _aligned(len(MAGIC) + 4 + header['header_length'])
+    for description in header['columns']:
+        column = Column(**description)
+        yield column, offset
+        offset = _aligned(offset + header['rows'] * column.dtype.itemsize)
+
+
+def write_table(path, header, columns):
+    """
+    Write a table to `path`.
+
+    `header` is a dict of JSON-serializable values describing the table.
+    `columns` is a sequence of (Column, values) pairs; every column must
+    have the same number of values.
+    """
+    columns = [(column, np.asarray(values)) for column, values in columns]
+    rows = {len(values) for _, values in columns}
+    if len(rows) != 1:
+        raise ValueError("All columns must have the same length")
+    with TableWriter(path, header, [column for column, _ in columns], rows.pop()) as writer:
+        writer.append([values for _, values in columns])
+
+
+class TableWriter:
+    """
+    Writes a table of `rows` rows to `path` one block of rows at a time,
+    so the whole table never needs to be in memory at once.
+
+    The file is made full size up front; each block appended is written
+    straight to its place in every column. The table only replaces
+    `path` once every row has been written.
+    """
+    def __init__(self, path, header, columns, rows):
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.rows = rows
+        self.written = 0
+
+        header = dict(header, rows=rows, columns=[column.describe() for column in self.columns])
+        encoded = json.dumps(header).encode('utf-8')
+        header['header_length'] = len(encoded)
+        self.offsets = [offset for _, offset in _layout(header)]
+
+        self.temporary = _temporary(self.path)
+        self.file = self.temporary.open('wb')
+        self.file.write(MAGIC)
+        self.file.write(struct.pack('<I', len(encoded)))
+        self.file.write(encoded)
+        self.file.truncate(self.offsets[-1] + rows * self.columns[-1].dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            self.temporary.unlink()
+
+    def append(self, values):
+        """Write the next block of rows, given one array of values per column"""
+        count = None
+        for column, offset, value in zip(self.columns, self.offsets, values):
+            raw = column.encode(value)
+            count = len(raw)
+            self.file.seek(offset + self.written * column.dtype.itemsize)
+            self.file.write(raw.tobytes())
+        self.written += count
+
+    def close(self):
+        self.file.close()
+        if self.written != self.rows:
+            raise ValueError(f"Only {self.written:,} of {self.rows:,} rows were written")
+        self.temporary.replace(self.path)
+
+
+def _temporary(path):
+    """A name to write `path` under until it's complete, unique to this process and thread"""
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def read_table(path, lazy=False):
+    """
+    Open a table written by `write_table`.
+
+    Returns (header, columns) where `columns` is a dict mapping each
+    column name to a (Column, raw values) pair. The raw values are
+    read-only NumPy arrays backed directly by the memory-mapped file,
+    or with `lazy`, `MonthShards` that read the file when needed. Either
+    way the table keeps the file it was opened from, even if a new table
+    replaces it at `path`.
+    """
+    f = Path(path).open('rb')
+    try:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _read_header(buffer, path)
+    except BaseException:
+        f.close()
+        raise
+    if lazy:
+        buffer.close()
+        bounds = _month_bounds(header)
+        return header, {
+            column.name: (column, MonthShards(f, column, offset, bounds))
+            for column, offset in _layout(header)
+        }
+    f.close()
+    return header, _columns(buffer, header)
+
+
+def _read_header(buffer, where):
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{where} is not a minute-by-minute table, or was made by an older version")
+    length, = struct.unpack_from('<I', buffer, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[start:start + length]).decode('utf-8'))
+    header['header_length'] = length
+    return header
+
+
+def _columns(buffer, header):
+    return {
+        column.name: (column, np.frombuffer(buffer, column.dtype, header['rows'], offset))
+        for column, offset in _layout(header)
+    }
+
+
+class SharedTable:
+    """
+    A table copied into a named shared memory segment, so that many
+    processes can read the one copy, e.g. the workers of a pre-fork
+    server. Create it in the parent process, pass `name` to each worker
+    and open it there with `attach_table(name)`.
+
+    The segment lasts until the process that made it calls `close()`.
+    """
+    def __init__(self, path, name=None):
+        data = Path(path).read_bytes()
+        _read_header(data, path)
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        self.memory.buf[:len(data)] = data
+        self.name = self.memory.name
+
+    def __repr__(self):
+        return f"<SharedTable {self.name} {self.memory.size:,} bytes>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+# Segments attached by this process, kept open for as long as it runs.
+_attached = {}
+
+
+def attach_table(name):
+    """
+    Open a table shared by a `SharedTable` in another process.
+    Returns (header, columns) as `read_table` does, with read-only
+    columns backed by the shared memory.
+    """
+    memory = _attached.get(name)
+    if memory is None:
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # before Python 3.13
+            # Children share their parent's resource tracker, but a tracker
+            # of our own would remove the segment when this process exits.
+            inherited = resource_tracker._resource_tracker._fd is not None
+            memory = shared_memory.SharedMemory(name=name)
+            if not inherited:
+                resource_tracker.unregister(memory._name, 'shared_memory')
+        _attached[name] = memory
+    buffer = memory.buf.toreadonly()
+    header = _read_header(buffer, name)
+    return header, _columns(buffer, header)
+
+
+def _month_bounds(header):
+    """The first row of each UTC month in the table, and the number of rows"""
+    start = np.datetime64(datetime.datetime.strptime(header['start'], START_FORMAT), 'm')
+    last = start + header['rows'] - 1
+    months = np.arange(start.astype('M8[M]') + 1, last.astype('M8[M]') + 1)
+    return [0] + (months.astype('M8[m]') - start).astype(int).tolist() + [header['rows']]
+
+
+# Reads the month after the one just read, in the background.
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+
+
+class MonthShards:
+    """
+    The raw values of one column of a table, read from the file a month
+    at a time when first needed, so looking up a single minute reads a
+    few hundred KB instead of the whole year. Reading a month also
+    starts reading the month after it in the background.
+
+    Indexing with a single row number returns one value; anything else
+    reads the whole column. `file` is the table's open file, shared by
+    its columns and closed when the last of them is gone.
+    """
+    def __init__(self, file, column, offset, bounds):
+        self.file = file
+        self.column = column
+        self.offset = offset
+        self.bounds = bounds
+        self._months = {}  # month number -> Future of its raw values
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<MonthShards {self.column.name} {len(self._months)} of {len(self.bounds) - 1} months read>"
+
+    def __len__(self):
+        return self.bounds[-1]
+
+    def __array__(self, dtype=None, copy=None):
+        values = np.concatenate([self._read(number).result() for number in range(len(self.bounds) - 1)])
+        return values if dtype is None else values.astype(dtype)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or np.ndim(index):
+            return np.asarray(self)[index]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"row {index} is not in the table")
+        number = bisect_right(self.bounds, index) - 1
+        return self.month(number)[index - self.bounds[number]]
+
+    def month(self, number):
+        """The raw values for the month `number` months after the start"""
+        values = self._read(number).result()
+        if number + 2 < len(self.bounds):
+            self._read(number + 1, background=True)
+        return values
+
+    def _read(self, number, background=False):
+        with self._lock:
+            future = self._months.get(number)
+            if future is not None:
+                return future
+            if background:
+                future = self._months[number] = _prefetcher.submit(self._load, number)
+                return future
+            future = self._months[number] = Future()
+        try:
+            future.set_result(self._load(number))
+        except BaseException as e:
+            with self._lock:
+                del self._months[number]
+            future.set_exception(e)
+        return future
+
+    def _load(self, number):
+        first, stop = self.bounds[number], self.bounds[number + 1]
+        itemsize = self.column.dtype.itemsize
+        data = os.pread(self.file.fileno(), (stop - first) * itemsize, self.offset + first * itemsize)
+        return np.frombuffer(data, self.column.dtype)
+
+
+def pack_positions(positions, start, days, tz):
+    """
+    Arrange (month, day, hour, minute, alt, az) tuples, in the local time
+    of `tz`, into columns indexed by UTC minute after the datetime `start`.
+    A table may run past the end of the year into the next one.
+    Any minutes missing from `positions` take the values of the next one.
+
+    The tuples are taken to be in the order of their UTC times, as they
+    were kept, which tells which year a local date at either end is in
+    (e.g. the 31 December of the table's first hours in US time zones),
+    and which of the repeated times is meant when the clocks fall back.
+    """
+    rows = days * MINUTES_PER_DAY
+    positions = np.array(positions, dtype=float)
+    month, day, hour, minute = positions[:, :4].astype(int).T
+    year = np.where(month >= start.month, start.year, start.year + 1)
+    dates = ((year - 1970) * 12 + month - 1).astype('M8[M]').astype('M8[D]') + (day - 1)
+    local = (dates - np.datetime64(start.date())).astype(np.int64) * MINUTES_PER_DAY + hour * 60 + minute
+    # Move the dates a year on (or back) wherever the times jump back (or on) by most of a year,
+    # so they run in order, and the middle of them is in the table's first year.
+    jump = np.diff(local)
+    wrapped = np.cumsum(np.r_[0, (jump < -rows // 2).astype(np.int64) - (jump > rows // 2)])
+    local += wrapped * rows
+    local -= int(np.median(local) // rows) * rows
+    # A time that comes again after a later one is the repeat after the clocks fall back.
+    repeat = np.r_[False, local[1:] <= np.maximum.accumulate(local)[:-1]]
+    index = TimeZoneIndex(tz, start, start + rows * MINUTE).to_utc(local, later=repeat)
+
+    alt, az = np.full(rows, np.nan), np.full(rows, np.nan)
+    inside = (0 <= index) & (index < rows)
+    alt[index[inside]], az[index[inside]] = positions[inside, 4], positions[inside, 5]
+
+    # Fill any gaps from the next valid row.
+    valid = np.where(np.isnan(alt), rows, np.arange(rows))
+    following = np.minimum.accumulate(valid[::-1])[::-1]
+    following[following == rows] = following[following < rows].max()
+    return alt[following], az[following]
+
+
+"""
+Parallel table generation. Each worker process is initialized once with
+a warm state (e.g. a `Sky`) and attaches to a shared memory array of
+a few block-sized slots. A worker writes the rows for a block of days
+straight into its slot, so only the block numbers travel between
+processes. Finished blocks wait in their slots until the blocks before
+them are done, and are then streamed to the table in order, so the
+memory needed does not depend on how long the table is.
+"""
+
+_worker = {}
+
+
+def _start_worker(name, shape, setup, setup_args):
+    memory = shared_memory.SharedMemory(name=name)
+    _worker['memory'] = memory
+    _worker['results'] = np.ndarray(shape, dtype=float, buffer=memory.buf)
+    _worker['state'] = setup(*setup_args)
+
+
+def _compute_block(compute, slot, first_day, days):
+    block = _worker['results'][slot, :, :days * MINUTES_PER_DAY]
+    block[...] = compute(_worker['state'], first_day, days)
+    return slot, first_day, days
+
+
+class Shards:
+    """
+    A directory of checkpoint files, one for each block of days that
+    has been calculated, so an interrupted calculation can carry on
+    where it left off. The header is saved alongside the blocks, and
+    any blocks calculated for a different header are thrown away.
+    """
+    def __init__(self, path, header):
+        self.directory = Path(path).with_name(Path(path).name + '.shards')
+        description = self.directory / 'header.json'
+        header = json.dumps(header, sort_keys=True)
+        if self.directory.exists() and (
+                not description.exists() or description.read_text() != header):
+            self.remove()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        description.write_text(header)
+
+    def path(self, first_day, days):
+        return self.directory / f"{first_day:05d}+{days}.npy"
+
+    def load(self, first_day, days):
+        """The saved block, or None"""
+        path = self.path(first_day, days)
+        return np.load(path) if path.exists() else None
+
+    def save(self, first_day, days, block):
+        path = self.path(first_day, days)
+        temporary = _temporary(path)
+        with temporary.open('wb') as f:
+            np.save(f, block)
+        temporary.replace(path)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def compute_table_in_parallel(
+        path, header, columns, *, setup, setup_args=(), compute, days,
+        block_days=7, max_workers=None, verbose=True):
+    """
+    Calculate a table in parallel and write it to `path`.
+
+    `setup(*setup_args)` is called once in each worker process and returns
+    the state passed to every `compute(state, first_day, days)` call, which
+    returns one array of values per column for each minute of those days.
+    Both must be module-level functions so they can be sent to the workers.
+
+    Each block of days is saved (see `Shards`) as soon as it is finished.
+    Running this again after a crash only calculates the missing blocks;
+    the checkpoints are removed once the table has been written.
+    With `verbose`, each block is reported as it is finished.
+    """
+    shards = Shards(path, dict(header, columns=[column.describe() for column in columns], days=days))
+    blocks = [(first_day, min(block_days, days - first_day)) for first_day in range(0, days, block_days)]
+    slots = 2 * (max_workers or os.cpu_count() or 1)
+    shape = (slots, len(columns), block_days * MINUTES_PER_DAY)
+    memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        results = np.ndarray(shape, dtype=float, buffer=memory.buf)
+        free = list(range(slots))
+        ready = {}  # first day -> slot, for finished blocks waiting their turn
+        running = set()
+        upcoming = iter(blocks)
+        next_day = 0
+        counter = 0
+        initargs = (memory.name, shape, setup, setup_args)
+        with TableWriter(path, header, columns, days * MINUTES_PER_DAY) as writer, \
+                ProcessPoolExecutor(max_workers, initializer=_start_worker, initargs=initargs) as ex:
+            while next_day < days:
+                # Keep every free slot busy with the next block.
+                while free and len(ready) + len(running) < slots:
+                    first_day, count = next(upcoming, (None, None))
+                    if first_day is None:
+                        break
+                    slot = free.pop()
+                    saved = shards.load(first_day, count)
+                    if saved is None:
+                        running.add(ex.submit(_compute_block, compute, slot, first_day, count))
+                    else:
+                        results[slot, :, :count * MINUTES_PER_DAY] = saved
+                        ready[first_day] = slot
+
+                # Write out whatever is next in order.
+                while next_day in ready:
+                    slot = ready.pop(next_day)
+                    count = min(block_days, days - next_day)
+                    writer.append(results[slot, :, :count * MINUTES_PER_DAY])
+                    free.append(slot)
+                    next_day += count
+                if next_day >= days or not running:
+                    continue
+
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                failed = [future for future in finished if future.exception() is not None]
+                if failed:
+                    # Keep every block that did finish, including those the pool
+                    # waits for anyway, so running this again starts from them.
+                    finished, running = finished | wait(running).done, set()
+                for future in finished:
+                    if future.exception() is not None:
+                        continue
+                    slot, first_day, count = future.result()
+                    shards.save(first_day, count, results[slot, :, :count * MINUTES_PER_DAY])
+                    ready[first_day] = slot
+                    counter += 1
+                    if verbose:
+                        print(f"{counter:3}. days {first_day}-{first_day + count - 1}")
+                if failed:
+                    failed[0].result()
+    finally:
+        results = None  # Release the buffer before closing
+        memory.close()
+        memory.unlink()
+    shards.remove()
+    return path
+
+
+def _utc_datetime64(times):
+    """Times as `datetime64[ns]` in UTC, from `datetime64` or pandas times"""
+    values = getattr(times, 'dt', times)  # the datetimes of a Series
+    if getattr(values, 'tz', None) is not None:
+        times = values.tz_convert('UTC')
+        times = getattr(times, 'dt', times).tz_localize(None)
+    return np.asarray(times, dtype='M8[ns]')
+
+
+def _is_leap(years):
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+
+def _onto_year(times, year):
+    """
+    `datetime64` times moved to the same date and time in `year` (or
+    an array of years), for the tables that are reused from year to
+    year. February 29th becomes the 28th when `year` isn't a leap year.
+    """
+    times = np.asarray(times, dtype='M8[ns]')
+    new_year = times.astype('M8[Y]')
+    elapsed = times - new_year
+    leap = _is_leap(new_year.astype(int) + 1970)
+    year = np.asarray(year)
+    # From February 29th (or March 1st) on, the day of the year differs by one.
+    day_of_year = elapsed // np.timedelta64(1, 'D')
+    shift = np.where(day_of_year >= 59, _is_leap(year).astype(int) - leap.astype(int), 0)
+    return (year - 1970).astype('M8[Y]').astype('M8[ns]') + elapsed + shift * np.timedelta64(1, 'D')
+
+
+def _years_later(times, years):
+    """`datetime64` times moved on by a number of `years`, to the same dates (see `_onto_year`)"""
+    times = np.asarray(times, dtype='M8[ns]')
+    return _onto_year(times, times.astype('M8[Y]').astype(int) + 1970 + years)
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class ZonedTable:
+    """
+    Shared by the position and event tables: the header, the columns and
+    the projection of the table's UTC minutes onto local time in `tz`
+    (by default, the time zone the table was made for).
+    """
+    periodic = False
+
+    def __init__(self, header, columns, tz=None):
+        self.header = header
+        self.columns = columns
+        self.start = datetime.datetime.strptime(header['start'], START_FORMAT)
+        if tz is None:
+            tz = header['tz']
+        self.tz = pytz.timezone(tz) if isinstance(tz, str) else tz
+        self.days = -(-self.span // MINUTES_PER_DAY)
+        self.zone = TimeZoneIndex(self.tz, self.start, self.start + self.span * MINUTE)
+        self._zones = {self.start.year: self.zone}
+
+        # Local dates are counted from the date the table starts.
+        self._day_number, self._month_number = {}, {}
+        for day in range(self.days):
+            date = self.start + datetime.timedelta(days=day)
+            self._day_number.setdefault((date.month, date.day), day)
+            self._month_number.setdefault(date.month, day)
+        if self.periodic and (2, 28) in self._day_number:
+            # Like `_onto_year`, a leap day in another year is taken as 28 February.
+            self._day_number.setdefault((2, 29), self._day_number[2, 28])
+
+    @property
+    def span(self):
+        """The number of minutes covered by the table"""
+        return self.header['rows']
+
+    def column(self, name):
+        """The decoded values of a column, as an array"""
+        column, raw = self.columns[name]
+        return column.decode(raw)
+
+    def in_zone(self, tz):
+        """The same table, with local times in another time zone"""
+        return type(self)(self.header, self.columns, tz)
+
+    def local_minute(self, month, day=None, hour=0, minute=0):
+        """A local (month, day, hour, minute) as local minutes after the start"""
+        if day is None:
+            day_number = self._month_number[month]
+        else:
+            day_number = self._day_number[month, day]
+        return day_number * MINUTES_PER_DAY + hour * 60 + minute
+
+    def local_key(self, utc_minute, year=None):
+        """The local (month, day, hour, minute) of a UTC minute after the start"""
+        date = self.local_datetime(utc_minute, year)
+        return date.month, date.day, date.hour, date.minute
+
+    def local_datetime(self, utc_minute, year=None):
+        """The naive local datetime of a UTC minute after the start (see `local_datetime64`)"""
+        return self.local_datetime64(int(utc_minute), year).item()
+
+    def local_datetime64(self, utc_minutes, year=None):
+        """
+        The naive local times of UTC minutes after the start, as
+        `datetime64[m]`. A `periodic` table's minutes are taken to be the
+        same dates in `year`, by default this year, and are given that
+        year's clock changes.
+        """
+        local = self._epoch() + self.zone_in(year).to_local(utc_minutes).astype('m8[m]')
+        if self.periodic:
+            local = _years_later(local, self._year(year) - self.start.year).astype('M8[m]')
+        return local
+
+    def local_columns(self, utc_minutes, year=None):
+        """The local (month, day, hour, minute) of UTC minutes after the start, as integer arrays"""
+        return calendar_columns(self.local_datetime64(utc_minutes, year))
+
+    def zone_in(self, year=None):
+        """
+        The `TimeZoneIndex` of the table's minutes. The clock changes on
+        different dates from year to year, so for a `periodic` table those
+        of `year` (by default this year) are moved onto the same dates in
+        the table's own year; each year's are found once.
+        """
+        if not self.periodic:
+            return self.zone
+        year = self._year(year)
+        if year not in self._zones:
+            years = year - self.start.year
+            start = _years_later(np.datetime64(self.start, 'm'), years).astype('M8[m]').item()
+            zone = TimeZoneIndex(self.tz, start, start + self.span * MINUTE)
+            changes = np.datetime64(start, 'm') + zone.starts[1:].astype('m8[m]')
+            moved = _years_later(changes, -years) - np.datetime64(self.start, 'ns')
+            self._zones[year] = zone.moved(self.start, (moved // np.timedelta64(1, 'm')).tolist())
+        return self._zones[year]
+
+    @staticmethod
+    def _year(year=None):
+        return datetime.date.today().year if year is None else year
+
+    def day_number(self, date):
+        """The number of a local date, counted from the date the table starts"""
+        number = date.toordinal() - self.start.toordinal()
+        if not 0 <= number < self.days:
+            raise ValueError(f"{date} is not in the table")
+        return number
+
+    def _aware(self, when):
+        """A datetime, taking naive ones to be local times"""
+        if when.tzinfo is None:
+            when = self.tz.localize(when) if hasattr(self.tz, 'localize') else when.replace(tzinfo=self.tz)
+        return when
+
+    def _epoch(self):
+        """The start of the table as `datetime64[m]`"""
+        return np.datetime64(self.start, 'm')
+
+    def _dated(self, times, year=None):
+        """
+        The UTC `datetime64` times of a periodic table moved to the same
+        dates in `year`, if one is given, and which of them to keep: the
+        29th of February of a table made for a leap year has no place in
+        other years.
+        """
+        if not self.periodic or year is None:
+            return times, slice(None)
+        moved = _years_later(times, year - self.start.year).astype(times.dtype)
+        kept = moved.astype('M8[D]') - moved.astype('M8[M]') == times.astype('M8[D]') - times.astype('M8[M]')
+        if kept.all():
+            return moved, slice(None)
+        return moved[kept], kept
+
+    def utc_minute(self, when):
+        """
+        A datetime (naive ones are UTC) as the UTC minute after the start.
+        A `periodic` table takes the same date and time in its own year.
+        """
+        if when.tzinfo is not None:
+            when = when.astimezone(pytz.utc).replace(tzinfo=None)
+        if self.periodic:
+            moved = _onto_year(np.datetime64(when, 'ns'), self.start.year)
+            return int((moved - np.datetime64(self.start, 'ns')) // np.timedelta64(1, 'm'))
+        return (when - self.start) // MINUTE
+
+
+def _datetime(value, year=None):
+    """The datetime of a (month, day, hour, minute, ...) row, this year by default"""
+    if year is None:
+        year = datetime.date.today().year
+    return datetime.datetime(year, *value[:4])
+
+
+class Position:
+    """
+    Wraps a row of a `MinuteTable` into a friendlier format
+    that looks better both on the command line and in the Notebook.
+    The `date` is only made when it is asked for.
+
+    Subclasses set `glyphs`, the HTML shown in the Notebook with a body
+    (above, below) the horizon; without them it's shown as plain text.
+    """
+    __slots__ = ('_value', '_year', '_date', 'alt', 'az', 'index')
+    glyphs = None
+
+    def __init__(self, value, index, year=None):
+        self._value = value
+        self._year = year
+        self._date = None
+        self.alt = value[4]
+        self.az = value[5]
+        self.index = index
+
+    @property
+    def date(self):
+        if self._date is None:
+            self._date = _datetime(self._value, self._year)
+        return self._date
+
+    def __repr__(self):
+        return "{0.date:%A %-d %b %-H:%M} Alt={0.alt:.0f}° Az={0.az:.0f}°".format(self)
+
+    def _repr_html_(self):
+        """Having fun with display in the Jupyter Notebook"""
+        if self.glyphs is None:
+            return None
+        above, below = self.glyphs
+        if self.alt > 0:
+            tag, front, behind = 'b', above, ''  # bold text
+        else:
+            tag, front, behind = 'em', '', below  # italic text
+        return f"{front}<{tag}>{self!r}</{tag}>{behind}"
+
+
+class MinuteTable(ZonedTable):
+    """
+    Base class for the minute-by-minute position tables.
+
+    Row `i` of the table is UTC minute `i` after the start of the
+    table, with the altitude and azimuth held in memory-mapped columns.
+    Each row is presented in local time as a tuple:
+        (month, day, hour, minute, altitude, azimuth)
+
+    Local times are converted to a row number with simple arithmetic,
+    using a (month, day) -> day number index built when the table is
+    loaded, and the small `TimeZoneIndex` of the clock changes.
+    When the clocks fall back, the first of the repeated times is used.
+
+    A `periodic` table is reused year after year, so times beyond
+    either end of the table wrap around to the other end, and its rows
+    are dated in the current year, or the year asked for, with that
+    year's clock changes. Other tables, which may cover several years,
+    date each row in its own year.
+
+    Subclasses may set `position_class` to wrap the rows they return.
+    """
+    position_class = Position
+    periodic = False
+
+    def __init__(self, header, columns, tz=None):
+        super().__init__(header, columns, tz)
+        (self._alt_column, self._alt), (self._az_column, self._az) = (
+            columns['alt'], columns['az'])
+
+    def __len__(self):
+        return self.header['rows']
+
+    def __iter__(self):
+        local = self.local_datetime64(np.arange(len(self)))
+        years = (local.astype('M8[Y]').astype(int) + 1970).tolist()
+        for index, (row, year) in enumerate(zip(self.rows(), years)):
+            yield self.position_class(row, index, year)
+
+    def __getitem__(self, index):
+        """Returns the position at the specified index"""
+        if index < 0:
+            index += len(self)
+        return self.position(index)
+
+    def position(self, index, year=None):
+        """
+        The position at `index`, dated in its own year, or for a
+        periodic table in `year` (by default the current year).
+        """
+        local = self.local_datetime(index, year)
+        return self.position_class(self._row(index, local), index, local.year)
+
+    def row(self, index, year=None):
+        """The local (month, day, hour, minute, altitude, azimuth) tuple for a row"""
+        return self._row(index, self.local_datetime(index, year))
+
+    def _row(self, index, local):
+        return (local.month, local.day, local.hour, local.minute,
+                float(self._alt_column.decode(self._alt[index])),
+                float(self._az_column.decode(self._az[index])))
+
+    def rows(self, year=None):
+        """Generates every row of the table as a tuple"""
+        for first in range(0, len(self), 31 * MINUTES_PER_DAY):
+            rows = np.arange(first, min(first + 31 * MINUTES_PER_DAY, len(self)))
+            columns = self.local_columns(rows, year)
+            yield from zip(*(column.tolist() for column in columns), self.alt[rows].tolist(), self.az[rows].tolist())
+
+    @property
+    def data(self):
+        """
+        A list of every row, dated in the table's own year, as the tables
+        used to keep them. It's made anew each time, so keep it if needed.
+        """
+        return list(self.rows(self.start.year))
+
+    @lazyproperty
+    def alt(self):
+        """The altitude of every row, as a read-only array"""
+        return _read_only(self._alt_column.decode(self._alt))
+
+    @lazyproperty
+    def az(self):
+        """The azimuth of every row, as a read-only array"""
+        return _read_only(self._az_column.decode(self._az))
+
+    def to_numpy(self, year=None):
+        """
+        The whole table as a structured array with `utc` and `local`
+        (naive) `datetime64[m]`, `alt` and `az` fields. A table that is
+        reused from year to year can be dated in another `year`, by
+        calendar date and with that year's clock changes.
+        """
+        minutes = np.arange(len(self))
+        utc, rows = self._dated(self._epoch() + minutes.astype('m8[m]'), year)
+        array = np.empty(len(utc), dtype=[('utc', 'M8[m]'), ('local', 'M8[m]'), ('alt', float), ('az', float)])
+        array['utc'] = utc
+        array['local'] = self.local_datetime64(minutes[rows], year or self.start.year)
+        array['alt'] = self.alt[rows]
+        array['az'] = self.az[rows]
+        return array
+
+    def to_frame(self, year=None):
+        """
+        The whole table as a pandas DataFrame of `alt` and `az`, indexed by
+        time in the table's time zone. The columns share the table's arrays,
+        unless a leap day has to be left out (see `to_numpy`).
+        """
+        import pandas as pd
+        utc, rows = self._dated(self._epoch() + np.arange(len(self)).astype('m8[m]'), year)
+        index = pd.DatetimeIndex(utc.astype('M8[ns]'), name='time').tz_localize('UTC').tz_convert(str(self.tz))
+        return pd.DataFrame({'alt': self.alt[rows], 'az': self.az[rows]}, index=index, copy=False)
+
+    @lazyproperty
+    def day_summary(self):
+        """
+        The (min, max) of each column for each UTC day of the table,
+        as a dict of arrays with one row per day.
+        """
+        summary = {}
+        for name in ('alt', 'az'):
+            values = getattr(self, name)
+            padded = np.full(self.days * MINUTES_PER_DAY, np.nan)
+            padded[:len(values)] = values
+            days = padded.reshape(self.days, MINUTES_PER_DAY)
+            summary[name] = _read_only(np.stack([np.nanmin(days, axis=1), np.nanmax(days, axis=1)], axis=1))
+        return summary
+
+    def where(self, alt=None, az=None):
+        """
+        The minutes when the altitude and azimuth are within the given
+        (low, high) ranges, inclusive, as an array of [start, stop) row
+        runs. An azimuth range with low > high passes through north.
+        Days whose `day_summary` rules them out are skipped.
+
+            >>> for start, stop in sun.where(alt=(0, 10), az=(240, 300)):
+            ...     print(sun[start], stop - start)
+        """
+        candidates = np.ones(self.days, dtype=bool)
+        tests = []
+        if alt is not None:
+            low, high = alt
+            lowest, highest = self.day_summary['alt'].T
+            candidates &= (highest >= low) & (lowest <= high)
+            tests.append(lambda rows: (self.alt[rows] >= low) & (self.alt[rows] <= high))
+        if az is not None:
+            west, east = az
+            lowest, highest = self.day_summary['az'].T
+            if west <= east:
+                candidates &= (highest >= west) & (lowest <= east)
+                tests.append(lambda rows: (self.az[rows] >= west) & (self.az[rows] <= east))
+            else:
+                candidates &= (highest >= west) | (lowest <= east)
+                tests.append(lambda rows: (self.az[rows] >= west) | (self.az[rows] <= east))
+
+        days = np.flatnonzero(candidates)
+        rows = (days[:, None] * MINUTES_PER_DAY + np.arange(MINUTES_PER_DAY)).ravel()
+        rows = rows[rows < len(self)]
+        matches = np.ones(len(rows), dtype=bool)
+        for test in tests:
+            matches &= test(rows)
+        inside = np.zeros(len(self) + 2, dtype=np.int8)
+        inside[rows[matches] + 1] = 1
+        edges = np.flatnonzero(np.diff(inside))
+        return edges.reshape(-1, 2)
+
+    @lazyproperty
+    def minute_of_year(self):
+        """
+        The local minute of the year of every row, as a read-only array,
+        counted from midnight on 1 January of the year the table starts in.
+        """
+        new_year = datetime.datetime(self.start.year, 1, 1)
+        local = self.zone.to_local(np.arange(len(self)))
+        return _read_only(local + (self.start - new_year) // MINUTE)
+
+    def _checked(self, index, what):
+        if self.periodic:
+            return index % len(self)
+        if 0 <= index < len(self):
+            return index
+        raise ValueError(f"{what} is not in the table")
+
+    def index(self, month, day=None, hour=0, minute=0):
+        """The row number for a local (month, day, hour, minute), this year if the table is periodic"""
+        local = self.local_minute(month, day, hour, minute)
+        return self._checked(int(self.zone_in().to_utc(local)), (month, day, hour, minute))
+
+    def at(self, *args):
+        """
+        Returns the position at a specified local (month, day, hour, minute).
+        You can use up to 4 arguments, depending on how close
+        you want to specify.
+        """
+        try:
+            return self[self.index(*args)]
+        except KeyError:
+            raise ValueError(f"{args} is not in the table") from None
+
+    def now(self):
+        """Return the position at the current time"""
+        return self.at_time(datetime.datetime.now(pytz.utc))
+
+    def at_time(self, when):
+        """Returns the position at a datetime (naive ones are local times)"""
+        aware = self._aware(when)
+        index = self._checked(self.utc_minute(aware), when)
+        # A periodic table's row is dated in the (UTC) year asked for.
+        return self.position(index, aware.astimezone(pytz.utc).year)
+
+    def at_many(self, times):
+        """
+        The (altitude, azimuth) arrays at many times at once, interpolated
+        linearly between the minutes of the table.
+
+        `times` is an array of `datetime64` in UTC, or a pandas
+        `DatetimeIndex` or Series (naive ones are taken to be UTC).
+        A `periodic` table takes the same dates and times in its own year.
+        """
+        times = _utc_datetime64(times)
+        if self.periodic:
+            times = _onto_year(times, self.start.year)
+        minutes = (times - np.datetime64(self.start, 'ns')) / np.timedelta64(1, 'm')
+        before = np.floor(minutes)
+        fraction = minutes - before
+        before = before.astype(np.int64)
+        if self.periodic:
+            before %= len(self)
+            after = (before + 1) % len(self)
+        else:
+            outside = (minutes < 0) | (minutes > len(self) - 1)
+            if outside.any():
+                raise ValueError(f"{times[outside][0]} is not in the table")
+            after = np.minimum(before + 1, len(self) - 1)
+
+        alt, az = self.alt, self.az
+        alt = alt[before] + fraction * (alt[after] - alt[before])
+        # Take the short way around when the azimuth passes north.
+        turn = (az[after] - az[before] + 180) % 360 - 180
+        az = (az[before] + fraction * turn) % 360
+        return alt, az
+
+
+class Event:
+    """One event from an `EventTable`; the `date` is only made when it is asked for."""
+    __slots__ = ('_value', '_year', '_date', 'name', 'az')
+
+    def __init__(self, value, year=None):
+        self._value = value
+        self._year = year
+        self._date = None
+        self.name = value[4]
+        self.az = value[5]
+
+    @property
+    def date(self):
+        if self._date is None:
+            self._date = _datetime(self._value, self._year)
+        return self._date
+
+    def __repr__(self):
+        return f"{self.date:%a %d %b %H:%M} {self.name} {self.az}°"
+
+    def __str__(self):
+        if self.name in ('Rise', 'Set'):  # suppress azimuth for twilight events
+            az = f"@{self.az}°"
+        else:
+            az = ''
+        return f"{self.date:%-H:%M} {self.name} {az}"
+
+
+class DayEvents(UserList):
+    """Wraps all events for a given day. Subclasses set the `title`, e.g. 'Sun Events'."""
+    title = 'Events'
+
+    def _repr_html_(self):
+        s = []
+        a = s.append
+        a(f"<h2>{self.title} on {self[0].date:%A, %-d %B %Y}</h2>")
+        a(f"<ul>")
+        for ev in self:
+            a(f"<li>{ev!s}</li>")
+        a("</ul>")
+        return ''.join(s)
+
+
+class EventTable(ZonedTable):
+    """
+    Base class for the tables of horizon events, e.g. sunrise and sunset.
+
+    Each event is stored as its UTC time, in seconds after the start,
+    the number of its name in the header's `names`, and its azimuth.
+    Each event is presented in local time as a tuple:
+        (month, day, hour, minute, name, azimuth)
+
+    When the table is loaded we find where each local day's events begin,
+    so `day_bounds[d]:day_bounds[d + 1]` are the events on day number `d`.
+
+    Subclasses may set `event_class` to wrap the events they return. Like
+    `MinuteTable`, the events of a `periodic` table are dated in the
+    current year, or the year asked for, with that year's clock changes;
+    its days are found again for each year that's used. Others date
+    their events in their own year.
+    """
+    event_class = Event
+    periodic = False
+
+    def __init__(self, header, columns, tz=None):
+        super().__init__(header, columns, tz)
+        self.names = header['names']
+        self._time = columns['time'][1]
+        self._kind = columns['kind'][1]
+        self._az = columns['az'][1]
+        self._days, self._firsts = {}, {}
+        self._local, self.day_bounds = self._local_days(self.start.year)
+
+    def _local_days(self, year=None):
+        """The local minutes of the events and their `day_bounds`, for `year` if the table is periodic"""
+        year = self._year(year) if self.periodic else self.start.year
+        if year not in self._days:
+            local = self.zone_in(year).to_local(self._time // 60)
+            midnights = np.arange(self.days + 1) * MINUTES_PER_DAY
+            self._days[year] = local, np.searchsorted(local, midnights).tolist()
+        return self._days[year]
+
+    @property
+    def span(self):
+        return self.header['span']
+
+    def __len__(self):
+        return len(self._time)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return self.event(index)
+
+    def event(self, index, year=None):
+        """
+        The event at `index`, dated in its own year, or in `year`
+        (by default the current year) if the table is periodic.
+        """
+        local = self.local_datetime((int(self._time[index]) + 30) // 60, year)
+        return self.event_class(self._row(index, local), local.year)
+
+    def row(self, index, year=None):
+        """The local (month, day, hour, minute, name, azimuth) tuple for an event"""
+        return self._row(index, self.local_datetime((int(self._time[index]) + 30) // 60, year))
+
+    def _row(self, index, local):
+        return (local.month, local.day, local.hour, local.minute,
+                self.names[self._kind[index]], int(self._az[index]))
+
+    @property
+    def data(self):
+        """
+        A list of every event's row, dated in the table's own year, as the
+        tables used to keep them. It's made anew each time.
+        """
+        return [self.row(index, self.start.year) for index in range(len(self))]
+
+    def at(self, *args):
+        """The first event at or after a local (month, day, hour, minute), this year if the table is periodic"""
+        local, _ = self._local_days()
+        return self[int(np.searchsorted(local, self.local_minute(*args)))]
+
+    def on_date(self, month, day):
+        """The events on a local (month, day), this year if the table is periodic"""
+        return self._on_day(self._day_number[month, day])
+
+    def on(self, date):
+        """The events on a local date"""
+        if self.periodic:
+            return self._on_day(self._day_number[date.month, date.day], date.year)
+        return self._on_day(self.day_number(date))
+
+    def _on_day(self, day_number, year=None):
+        _, bounds = self._local_days(year)
+        return EventView(self, bounds[day_number], bounds[day_number + 1], year)
+
+    def _first_of_name(self, year=None):
+        """
+        The index of the first event of each name on each local day, or -1,
+        found the first time it's needed (for each year, if periodic)
+        """
+        year = self._year(year) if self.periodic else self.start.year
+        if year not in self._firsts:
+            _, bounds = self._local_days(year)
+            first = np.full((len(self.names), self.days), -1, dtype=np.int64)
+            day = np.searchsorted(bounds, np.arange(len(self)), side='right') - 1
+            index = np.flatnonzero((0 <= day) & (day < self.days))[::-1]
+            first[np.asarray(self._kind)[index], day[index]] = index
+            self._firsts[year] = first
+        return self._firsts[year]
+
+    def event_on(self, date, name):
+        """
+        The first event called `name`, e.g. 'Transit', on a local date,
+        or None if there isn't one. The events are indexed by name and day
+        the first time this is used, so each look-up is direct.
+        """
+        if self.periodic:
+            first, day_number = self._first_of_name(date.year), self._day_number[date.month, date.day]
+        else:
+            first, day_number = self._first_of_name(), self.day_number(date)
+        index = int(first[self.names.index(name), day_number])
+        return None if index < 0 else self.event(index, date.year)
+
+    def events_between(self, start, end):
+        """
+        The events from the datetime `start` up to `end`;
+        naive datetimes are taken to be local times. A periodic
+        table's events repeat each year, for as many years as the
+        range covers; other tables raise ValueError for a range
+        that isn't in the table.
+        """
+        start, end = self._aware(start), self._aware(end)
+        first, last = self._seconds(start), self._seconds(end)
+        if not self.periodic:
+            for when, second in ((start, first), (end, last)):
+                if not 0 <= second <= self.span * 60:
+                    raise ValueError(f"{when} is not in the table")
+        first, last = (int(index) for index in np.searchsorted(self._time, (first, last)))
+        if end <= start:
+            return EventView(self, first, first)
+        year = start.astimezone(self.tz).year
+        if self.periodic:
+            # Each new (local) year runs on past the end of the table into its start.
+            last += (end.astimezone(self.tz).year - year) * len(self)
+        return EventView(self, first, last, year if self.periodic else None)
+
+    def to_numpy(self, year=None):
+        """
+        The events as a structured array with `utc` and `local` (naive)
+        `datetime64[s]`, `name` and `az` fields. Events that are reused
+        from year to year can be dated in another `year`.
+        """
+        seconds = np.asarray(self._time, dtype=np.int64)
+        utc, events = self._dated(self._epoch().astype('M8[s]') + seconds.astype('m8[s]'), year)
+        seconds = seconds[events]
+        local = self.local_datetime64(seconds // 60, year or self.start.year)
+        width = max(map(len, self.names))
+        array = np.empty(len(utc), dtype=[('utc', 'M8[s]'), ('local', 'M8[s]'), ('name', f'U{width}'), ('az', int)])
+        array['utc'] = utc
+        array['local'] = local.astype('M8[s]') + (seconds % 60).astype('m8[s]')
+        array['name'] = np.array(self.names)[np.asarray(self._kind)[events]]
+        array['az'] = self._az[events]
+        return array
+
+    def to_frame(self, year=None):
+        """
+        The events as a pandas DataFrame of `name` (categorical) and `az`,
+        indexed by time in the table's time zone.
+        """
+        import pandas as pd
+        utc, events = self._dated(
+            self._epoch().astype('M8[s]') + np.asarray(self._time, dtype=np.int64).astype('m8[s]'), year)
+        index = pd.DatetimeIndex(utc.astype('M8[ns]'), name='time').tz_localize('UTC').tz_convert(str(self.tz))
+        name = pd.Categorical.from_codes(np.asarray(self._kind)[events], categories=self.names)
+        return pd.DataFrame({'name': name, 'az': self._az[events]}, index=index, copy=False)
+
+    def _seconds(self, when):
+        when = self._aware(when)
+        if not self.periodic:
+            return self.utc_minute(when) * 60 + when.second
+        # The events are kept by local day, so take the same local time in the table's year,
+        # with the clock changes of the year asked for.
+        local = when.astimezone(self.tz).replace(tzinfo=None)
+        moved = _onto_year(np.datetime64(local, 'ns'), self.start.year) - np.datetime64(self.start, 'ns')
+        return int(self.zone_in(local.year).to_utc(moved // np.timedelta64(1, 'm'))) * 60 + when.second
+
+
+class EventView:
+    """
+    A range of the events in an `EventTable`. Nothing is copied;
+    each event is only made when it is asked for. The range of a
+    periodic table can run past its end and on from its start,
+    with the events after the end dated in the year after `year`.
+    """
+    def __init__(self, table, start, stop, year=None):
+        self.table = table
+        self.start = start
+        self.stop = stop
+        self.year = year
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        for index in range(self.start, self.stop):
+            yield self._event(index)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return self._event(self.start + index)
+
+    def _event(self, index):
+        wrapped, index = divmod(index, len(self.table))
+        return self.table.event(index, None if self.year is None else self.year + wrapped)
+
+
+def crossing_arrays(altitudes, azimuths, levels):
+    """
+    Find every time the altitude passes through each of the `levels`.
+    Returns arrays of the number of the level crossed, the time in
+    (fractional) seconds after the start, whether it was rising and the
+    azimuth, in order of level and then time.
+
+    The time of each crossing is interpolated between the minutes on
+    either side of it, and the azimuth the short way around the circle.
+    """
+    levels = np.asarray(levels, dtype=float)
+    above = altitudes[np.newaxis, :] > levels[:, np.newaxis]
+    which, minute = np.nonzero(above[:, 1:] != above[:, :-1])
+    before, after = altitudes[minute], altitudes[minute + 1]
+    fraction = (levels[which] - before) / (after - before)
+    turn = (azimuths[minute + 1] - azimuths[minute] + 180) % 360 - 180
+    az = (azimuths[minute] + fraction * turn) % 360
+    return which, (minute + fraction) * 60, above[which, minute + 1], az
+
+
+def refine_crossings(function, low, high, tolerance):
+    """
+    Refine many crossings at once. `function` maps an array of times to
+    an array of values, and crossing `i` is where it passes through zero
+    between `low[i]` and `high[i]`. Returns the times of the crossings,
+    with NaN where the values at the two ends have the same sign.
+
+    Each bracket is narrowed by the Illinois variant of the secant method
+    (bisecting if a step ever falls outside the bracket) until it's within
+    `tolerance`. `function` is called once per iteration, for every
+    crossing not yet settled.
+    """
+    low, high = np.array(low, dtype=float), np.array(high, dtype=float)
+    values = function(np.concatenate([low, high]))
+    f_low, f_high = values[:len(low)], values[len(low):]
+    found = (f_low > 0) != (f_high > 0)
+    kept = np.zeros(len(low), dtype=int)  # The end kept by the last step: -1 low, 1 high
+    for _ in range(100):
+        active = np.flatnonzero(found & (high - low > tolerance))
+        if not len(active):
+            break
+        a, b, fa, fb = low[active], high[active], f_low[active], f_high[active]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = b - fb * (b - a) / (fb - fa)
+        at_end = (x == a) | (x == b)  # the crossing is at an end already
+        x = np.where((x > a) & (x < b) | at_end, x, (a + b) / 2)
+        fx = function(x)
+        right = (fx > 0) == (fa > 0)  # the crossing is between x and b
+        # An end kept twice running has its value halved, so the next
+        # secant lands on its side of the crossing.
+        fa = np.where(~right & (kept[active] == -1), fa / 2, fa)
+        fb = np.where(right & (kept[active] == 1), fb / 2, fb)
+        low[active] = np.where(right, x, a)
+        f_low[active] = np.where(right, fx, fa)
+        high[active] = np.where(right, b, x)
+        f_high[active] = np.where(right, fb, fx)
+        kept[active] = np.where(right, 1, -1)
+        low[active[at_end]] = high[active[at_end]] = x[at_end]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        times = low - f_low * (high - low) / (f_high - f_low)
+    return np.where(found, np.where(np.isfinite(times), times, low), np.nan)
+
+
+def find_transits(azimuths):
+    """
+    Find every upper transit: when the body crosses the meridian from
+    east to west, whether south or north of the zenith. Returns the times
+    in (fractional) seconds after the start, interpolated between minutes.
+    """
+    east = np.sin(np.radians(azimuths))
+    minute = np.flatnonzero((east[:-1] > 0) & (east[1:] <= 0))
+    fraction = east[minute] / (east[minute] - east[minute + 1])
+    return (minute + fraction) * 60
+
+
+def crossing_events(thresholds, which, seconds, rising, azimuths):
+    """
+    The crossings found by `crossing_arrays` (and perhaps refined) as a
+    list of (UTC seconds after the start, name, azimuth) events, ready
+    for `write_events`. `which` numbers the crossing's threshold in
+    `thresholds`; the seconds and azimuths are rounded.
+    """
+    seconds = np.round(seconds).astype(int)
+    azimuths = np.round(azimuths).astype(int) % 360
+    return [
+        (second, threshold.rising if up else threshold.setting, azimuth)
+        for second, threshold, up, azimuth in zip(
+            seconds.tolist(), (thresholds[i] for i in which), rising.tolist(), azimuths.tolist())
+    ]
+
+
+def write_events(path, header, events, names, span):
+    """
+    Save a list of (UTC seconds after the start, name, azimuth) events
+    to `path`, `span` being the number of minutes the events cover.
+    """
+    events = sorted(events)
+    time = np.array([event[0] for event in events], dtype=float)
+    kind = np.array([names.index(event[1]) for event in events], dtype=float)
+    az = np.array([event[2] for event in events], dtype=float)
+    header = dict(header, names=list(names), span=span)
+    write_table(path, header, zip(EVENT_COLUMNS, (time, kind, az)))
+
+
+"""
+Chebyshev fits: instead of a sample every minute, each segment of the
+table (a day, by default) holds the coefficients of a Chebyshev series
+for each component of the unit vector (east, north, up) towards the body.
+The vector moves smoothly, even through north and near the zenith, where
+the azimuth jumps. The series are fitted to the geometric positions;
+refraction is smooth only above the horizon, so it's applied after the
+series is evaluated.
+"""
+
+CHEBYSHEV_COLUMN = Column('coefficients', '<f4', 1)
+
+
+def _unit_vectors(alt, az):
+    alt, az = np.radians(alt), np.radians(az)
+    return np.stack([np.cos(alt) * np.sin(az), np.cos(alt) * np.cos(az), np.sin(alt)])
+
+
+def _altaz(vectors):
+    east, north, up = vectors
+    return np.degrees(np.arctan2(up, np.hypot(east, north))), np.degrees(np.arctan2(east, north)) % 360
+
+
+def fit_chebyshev(alt, az, segment_minutes=MINUTES_PER_DAY, degree=16):
+    """
+    Fit Chebyshev series to the geometric altitude and azimuth of each
+    minute, in whole segments of `segment_minutes`.
+
+    Returns (coefficients, error): a (segments, 3, degree + 1) array
+    and the largest angle in degrees between a fitted position, as
+    stored, and the position it was fitted to.
+    """
+    vectors = _unit_vectors(alt, az)
+    segments = len(alt) // segment_minutes
+    if segments * segment_minutes != len(alt):
+        raise ValueError(f"{len(alt):,} minutes is not a whole number of {segment_minutes}-minute segments")
+    x = 2 * np.arange(segment_minutes) / segment_minutes - 1
+    basis = np.polynomial.chebyshev.chebvander(x, degree)
+    samples = vectors.reshape(3, segments, segment_minutes).transpose(2, 1, 0).reshape(segment_minutes, -1)
+    coefficients, *_ = np.linalg.lstsq(basis, samples, rcond=None)
+    coefficients = CHEBYSHEV_COLUMN.encode(coefficients)
+
+    fitted = (basis @ coefficients).reshape(segment_minutes, segments, 3).transpose(2, 1, 0).reshape(3, -1)
+    cosine = (fitted * vectors).sum(axis=0) / np.linalg.norm(fitted, axis=0)
+    error = np.degrees(np.arccos(np.clip(cosine, -1, 1))).max()
+    return coefficients.reshape(degree + 1, segments, 3).transpose(1, 2, 0), float(error)
+
+
+def write_chebyshev(path, header, coefficients, *, segment_minutes, max_error,
+                    refraction=None, periodic=False):
+    """
+    Save Chebyshev coefficients from `fit_chebyshev` (the fits of any
+    number of blocks may be concatenated) to `path`. `refraction` is the
+    (temperature, pressure) to apply when the fit is evaluated, if any.
+    """
+    segments, _, terms = coefficients.shape
+    header = dict(
+        header, segment_minutes=segment_minutes, degree=terms - 1, span=segments * segment_minutes,
+        max_error=max_error, refraction=None if refraction is None else list(map(float, refraction)),
+        periodic=periodic)
+    write_table(path, header, [(CHEBYSHEV_COLUMN, coefficients.ravel())])
+
+
+class ChebyshevTable:
+    """
+    The positions of a body as Chebyshev series (see `fit_chebyshev`),
+    which can be evaluated at any instant. The header's `max_error` is
+    the worst error of the fit, in degrees, over every minute.
+    A `periodic` table wraps around like the Sun's minute table.
+    """
+    def __init__(self, header, columns):
+        self.header = header
+        self.start = datetime.datetime.strptime(header['start'], START_FORMAT)
+        self.segment_minutes = header['segment_minutes']
+        self.span = header['span']
+        self.max_error = header['max_error']
+        self.refraction = header['refraction']
+        self.periodic = header['periodic']
+        _, raw = columns['coefficients']
+        self.coefficients = np.asarray(raw).reshape(-1, 3, header['degree'] + 1)
+
+    def __repr__(self):
+        return (f"<ChebyshevTable {self.header.get('body', '')} {len(self.coefficients)} segments "
+                f"of degree {self.header['degree']}, within {self.max_error:.1e}°>")
+
+    def at_many(self, times):
+        """
+        The (altitude, azimuth) arrays at many times at once. `times`
+        is as for `MinuteTable.at_many`.
+        """
+        times = _utc_datetime64(times)
+        if self.periodic:
+            times = _onto_year(times, self.start.year)
+        minutes = (times - np.datetime64(self.start, 'ns')) / np.timedelta64(1, 'm')
+        if self.periodic:
+            minutes %= self.span
+        else:
+            outside = (minutes < 0) | (minutes > self.span)
+            if outside.any():
+                raise ValueError(f"{times[outside][0]} is not in the table")
+        segment = np.minimum(minutes // self.segment_minutes, len(self.coefficients) - 1).astype(int)
+        x = 2 * (minutes - segment * self.segment_minutes) / self.segment_minutes - 1
+
+        # Clenshaw's recurrence, for every time at once.
+        x = x[:, np.newaxis]
+        later = latest = np.zeros((len(x), 3))
+        for k in range(self.coefficients.shape[2] - 1, 0, -1):
+            later, latest = 2 * x * later - latest + self.coefficients[segment, :, k], later
+        vectors = x * later - latest + self.coefficients[segment, :, 0]
+
+        alt, az = _altaz(vectors.T)
+        if self.refraction is not None:
+            alt = refract(alt, *self.refraction)
+        return alt, az
+
+    def at(self, when):
+        """The (altitude, azimuth) at a datetime (naive ones are UTC)"""
+        if when.tzinfo is not None:
+            when = when.astimezone(pytz.utc).replace(tzinfo=None)
+        alt, az = self.at_many(np.array([when], dtype='M8[ns]'))
+        return float(alt[0]), float(az[0])
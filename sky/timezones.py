@@ -0,0 +1,168 @@
+""" Convert whole arrays of times between UTC and local time with NumPy.
+
+    A time zone only changes its UTC offset a couple of times a year,
+    so rather than asking pytz about each time separately, we find the
+    transitions over the span of interest once (straight from pytz's own
+    table of them, where there is one) and then look up the offset of
+    every time in the array with `np.searchsorted`.
+
+    Times are expressed as whole minutes after an epoch, a naive datetime
+    that serves as the zero point for both the UTC and the local minutes.
+"""
+import copy
+import datetime
+from bisect import bisect_right
+
+import numpy as np
+import pytz
+
+
+MINUTE = datetime.timedelta(minutes=1)
+DAY = datetime.timedelta(days=1)
+HOUR_MINUTES = 60
+DAY_MINUTES = 1440
+BEFORE_EVERYTHING = -2 ** 62
+
+__all__ = ['TimeZoneIndex', 'calendar_columns', 'to_datetime64']
+
+
+class TimeZoneIndex:
+    """
+    The UTC offsets of `tz` between the naive datetimes `start` and `end`.
+
+    `starts[i]` is the UTC minute (after `start`) at which offset
+    `offsets[i]` (in minutes) takes effect.
+    """
+    def __init__(self, tz, start, end):
+        self.tz = tz
+        self.epoch = start
+
+        # Keep a day to spare on either side.
+        low, high = start - DAY, end + DAY
+        if hasattr(tz, '_utc_transition_times'):
+            starts, values = self._pytz_transitions(low, high)
+        else:
+            starts, values = self._probe_transitions(low, high)
+        self.starts = np.array([BEFORE_EVERYTHING] + starts, dtype=np.int64)
+        self.offsets = np.array(values, dtype=np.int64)
+        self.local_starts = self.starts + self.offsets
+
+    def _pytz_transitions(self, low, high):
+        """The changes of offset between `low` and `high`, read from pytz's own table"""
+        times, info = self.tz._utc_transition_times, self.tz._transition_info
+        first = max(bisect_right(times, low) - 1, 0)
+        last = bisect_right(times, high)
+        starts, values = [], [info[first][0] // MINUTE]
+        for time, (utcoffset, _, _) in zip(times[first + 1:last], info[first + 1:last]):
+            if utcoffset // MINUTE != values[-1]:
+                # The first whole minute with the new offset
+                starts.append(-((self.epoch - time) // MINUTE))
+                values.append(utcoffset // MINUTE)
+        return starts, values
+
+    def _probe_transitions(self, low, high):
+        """
+        The changes of offset between `low` and `high`, for other time zones:
+        look at the offset every day, then find each change to the minute.
+        """
+        days = range((low - self.epoch) // MINUTE, (high - self.epoch) // MINUTE + DAY_MINUTES, DAY_MINUTES)
+        offsets = [self.offset(minute) for minute in days]
+        starts, values = [], [offsets[0]]
+        for day, before, after in zip(days[1:], offsets, offsets[1:]):
+            if before != after:
+                starts.append(self._find_change(day - DAY_MINUTES, day, before))
+                values.append(after)
+        return starts, values
+
+    def moved(self, epoch, starts):
+        """
+        The same offsets, with their transitions at `starts`, UTC minutes
+        after another `epoch`; e.g. one year's clock changes laid onto
+        the same dates in another year.
+        """
+        zone = copy.copy(self)
+        zone.epoch = epoch
+        zone.starts = np.array([BEFORE_EVERYTHING] + list(starts), dtype=np.int64)
+        zone.local_starts = zone.starts + zone.offsets
+        return zone
+
+    def __repr__(self):
+        return f"<TimeZoneIndex {self.tz} from {self.epoch:%Y-%m-%d}, {len(self.starts) - 1} transitions>"
+
+    def offset(self, minute):
+        """The UTC offset, in minutes, at a single UTC minute after the epoch"""
+        utc = pytz.utc.localize(self.epoch + minute * MINUTE)
+        return utc.astimezone(self.tz).utcoffset() // MINUTE
+
+    def _find_change(self, low, high, before):
+        """Bisect to the first minute in (low, high] with a new offset"""
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.offset(middle) == before:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    def to_local(self, utc_minutes):
+        """Convert an array of UTC minutes to local minutes"""
+        utc_minutes = np.asarray(utc_minutes, dtype=np.int64)
+        which = np.searchsorted(self.starts, utc_minutes, side='right') - 1
+        return utc_minutes + self.offsets[which]
+
+    def to_utc(self, local_minutes, later=False):
+        """
+        Convert an array of local minutes to UTC minutes.
+
+        When the clocks fall back, the first of the repeated times is used,
+        or the second where `later` (a bool or an array of them) is true;
+        the hour skipped in the spring repeats the hour after it.
+        """
+        local_minutes = np.asarray(local_minutes, dtype=np.int64)
+        which = np.searchsorted(self.local_starts, local_minutes, side='right') - 1
+        earlier = np.maximum(which - 1, 0)
+        repeated = (which > 0) & (local_minutes - self.offsets[earlier] < self.starts[which])
+        which = np.where(repeated & ~np.asarray(later, dtype=bool), earlier, which)
+        return local_minutes - self.offsets[which]
+
+    def utc_minutes(self, times):
+        """
+        UTC minutes after the epoch for a Skyfield `Time`, an array
+        of `datetime64` in UTC, or an array of UTC minutes.
+        """
+        if hasattr(times, 'tt'):
+            times = to_datetime64(times)
+        times = np.asarray(times)
+        if times.dtype.kind == 'M':
+            times = (times - np.datetime64(self.epoch, 'm')) // np.timedelta64(1, 'm')
+        return times.astype(np.int64)
+
+    def local_datetime64(self, times):
+        """The local times, as naive `datetime64[m]`"""
+        local = self.to_local(self.utc_minutes(times))
+        return np.datetime64(self.epoch, 'm') + local.astype('m8[m]')
+
+    def local_columns(self, times):
+        """
+        The local (month, day, hour, minute) of each time, as integer arrays.
+        """
+        return calendar_columns(self.local_datetime64(times))
+
+
+def calendar_columns(times):
+    """The (month, day, hour, minute) of each `datetime64[m]`, as integer arrays"""
+    days = times.astype('M8[D]')
+    months = times.astype('M8[M]')
+    month = (months - times.astype('M8[Y]')).astype(int) + 1
+    day = (days - months).astype(int) + 1
+    minute_of_day = (times - days).astype(int)
+    hour, minute = np.divmod(minute_of_day, HOUR_MINUTES)
+    return month, day, hour, minute
+
+
+def to_datetime64(t):
+    """The UTC times of a Skyfield `Time` as `datetime64[m]`, rounded to the minute"""
+    year, month, day, hour, minute, second = (np.atleast_1d(value) for value in t.utc)
+    months = ((year - 1970) * 12 + month - 1).astype('M8[M]')
+    minutes = np.round((day - 1) * 1440 + hour * 60 + minute + second / 60).astype(np.int64)
+    return months.astype('M8[m]') + minutes.astype('m8[m]')